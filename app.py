@@ -1,66 +1,128 @@
-import os
-import pandas as pd
 import matplotlib
 matplotlib.use('Agg')  # <-- Ajoute cette ligne avant d'importer pyplot
-import matplotlib.pyplot as plt
-import seaborn as sns
-from flask import Flask, render_template, request
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from flask import Flask, Response, abort, jsonify, render_template, request, url_for
 import io
-import base64
+import json
+import math
+import hashlib
+import threading
+from collections import OrderedDict
+from results_index import ResultsIndex
+from live import DEFAULT_ADDRESS, LiveFeed
 
 app = Flask(__name__)
 
 DATA_ROOT = "data"
+MEANS_ROOT = "output_means"
+PNG_CACHE_SIZE = 128
+API_POINTS = 500  # default number of points per series returned by the API
+
+png_cache = OrderedDict()
+png_lock = threading.Lock()
+
+# Indexed once at startup, refreshed from directory/store mtimes
+results = ResultsIndex(DATA_ROOT, MEANS_ROOT)
+
+# Per-generation stats published by running simulations (see live.py)
+live_feed = LiveFeed()
+LIVE_BACKLOG = 500  # events replayed to a new dashboard
 
 def list_mutation_folders():
-    folders = [f for f in os.listdir(DATA_ROOT) if os.path.isdir(os.path.join(DATA_ROOT, f))]
-    print("Dossiers trouvés :", folders)
-    return folders
+    return results.folders()
 
 
 def list_csv_files(mutation_folder):
-    folder_path = os.path.join(DATA_ROOT, mutation_folder)
-    files = [f for f in os.listdir(folder_path) if f.endswith('.csv')]
-    print(f"Fichiers CSV dans {mutation_folder} :", files)
-    return files
+    return results.runs(mutation_folder)
 
 
 def load_results(mutation_folder, csv_file):
-    path = os.path.join(DATA_ROOT, mutation_folder, csv_file)
-    df = pd.read_csv(path, sep=';')
-    return df
+    return results.load(mutation_folder, csv_file)
 
 def describe_results(df):
     desc = df.describe()
     return desc
 
-def plot_evolution(df):
-    plt.figure(figsize=(10,5))
-    plt.plot(df['Generation'], df['Best Fitness'], label='Best Fitness')
-    plt.plot(df['Generation'], df['Average Fitness'], label='Average Fitness')
-    plt.xlabel('Generation')
-    plt.ylabel('Score')
-    plt.legend()
-    plt.title('Evolution des scores')
+def render_png(fig):
     buf = io.BytesIO()
-    plt.savefig(buf, format='png')
-    plt.close()
-    buf.seek(0)
-    return base64.b64encode(buf.getvalue()).decode('utf-8')
+    FigureCanvasAgg(fig).print_png(buf)
+    return buf.getvalue()
+
+# Figures are built with the object API (no pyplot global state), so
+# concurrent requests do not serialize on matplotlib.
+def plot_evolution(df):
+    fig = Figure(figsize=(10,5))
+    ax = fig.subplots()
+    ax.plot(df['Generation'], df['Best Fitness'], label='Best Fitness')
+    ax.plot(df['Generation'], df['Average Fitness'], label='Average Fitness')
+    ax.set_xlabel('Generation')
+    ax.set_ylabel('Score')
+    ax.legend()
+    ax.set_title('Evolution des scores')
+    return render_png(fig)
 
 def plot_comparison(all_results):
-    plt.figure(figsize=(10,5))
+    fig = Figure(figsize=(10,5))
+    ax = fig.subplots()
     for label, df in all_results.items():
-        plt.plot(df['Generation'], df['Best Distance'], label=f'{label}')
-    plt.xlabel('Generation')
-    plt.ylabel('Best Distance')
-    plt.legend()
-    plt.title('Comparaison convergence (Best Distance)')
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png')
-    plt.close()
-    buf.seek(0)
-    return base64.b64encode(buf.getvalue()).decode('utf-8')
+        ax.plot(df['Generation'], df['Best Distance'], label=f'{label}')
+    ax.set_xlabel('Generation')
+    ax.set_ylabel('Best Distance')
+    ax.legend()
+    ax.set_title('Comparaison convergence (Best Distance)')
+    return render_png(fig)
+
+def comparison_results():
+    """Per-rate means, or the first run of a rate when it has not been aggregated yet."""
+    all_results = {}
+    versions = []
+    for folder in list_mutation_folders():
+        df = results.summary(folder)
+        if df is not None:
+            versions.append(results.version(folder))
+        else:
+            csv_files = list_csv_files(folder)
+            if not csv_files:
+                continue
+            df = load_results(folder, csv_files[0])
+            versions.append(results.version(folder, csv_files[0]))
+        all_results[folder] = df
+    return all_results, versions
+
+def downsample(df, columns, points):
+    """At most `points` evenly spaced rows (the last one always kept), as JSON lists."""
+    step = max(1, math.ceil(len(df) / max(points, 1)))
+    rows = list(range(0, len(df), step))
+    if rows and rows[-1] != len(df) - 1:
+        rows.append(len(df) - 1)
+    part = df.iloc[rows]
+    return {column: part[column].tolist() for column in columns}
+
+def cached_png(key, render):
+    """
+    PNG response from the content-addressed cache (key = sources + mtimes +
+    plot parameters), with ETag / 304 Not Modified support.
+    """
+    etag = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    with png_lock:
+        png = png_cache.get(etag)
+        if png is not None:
+            png_cache.move_to_end(etag)
+    if png is None:
+        png = render()
+        with png_lock:
+            png_cache[etag] = png
+            if len(png_cache) > PNG_CACHE_SIZE:
+                png_cache.popitem(last=False)
+    response = Response(png, mimetype='image/png')
+    response.set_etag(etag)
+    response.cache_control.no_cache = True  # always revalidate, 304 when unchanged
+    return response
 
 @app.route('/')
 def index():
@@ -89,10 +151,13 @@ def explore():
     # Si dossier changé ou pas de csv sélectionné, prendre le premier CSV du dossier
     if (not selected_csv) or (request.method == 'POST' and 'mutation_folder' in request.form and request.form['mutation_folder'] != request.form.get('prev_folder')):
         selected_csv = csv_files[0]
+    if selected_csv not in csv_files:
+        selected_csv = csv_files[0]
 
     df = load_results(selected_folder, selected_csv)
     desc = describe_results(df).to_html(classes='table table-striped')
-    plot_url = plot_evolution(df)
+    data_url = url_for('api_run', folder=selected_folder, name=selected_csv)
+    plot_url = url_for('evolution_png', folder=selected_folder, name=selected_csv)
 
     return render_template('explore.html',
                            mutation_folders=mutation_folders,
@@ -100,20 +165,13 @@ def explore():
                            csv_files=csv_files,
                            selected_csv=selected_csv,
                            desc=desc,
+                           data_url=data_url,
                            plot_url=plot_url)
 
 
 @app.route('/compare')
 def compare():
-    mutation_folders = list_mutation_folders()
-    all_results = {}
-    for folder in mutation_folders:
-        csv_files = list_csv_files(folder)
-        if csv_files:
-            df = load_results(folder, csv_files[0])
-            all_results[folder] = df
-    plot_url = plot_comparison(all_results)  # Le graphique reste inchangé
-
+    all_results, _ = comparison_results()
     stats = {folder: df.iloc[-1][['Best Distance', 'Average Fitness']].to_dict() for folder, df in all_results.items()}
 
     # Récupérer les paramètres GET pour tri
@@ -128,7 +186,66 @@ def compare():
     reverse = (order == 'desc')
     sorted_stats = dict(sorted(stats.items(), key=lambda item: item[1][sort_by], reverse=reverse))
 
-    return render_template('compare.html', plot_url=plot_url, stats=sorted_stats, sort_by=sort_by, order=order)
+    return render_template('compare.html', data_url=url_for('api_compare'), plot_url=url_for('compare_png'),
+                           stats=sorted_stats, sort_by=sort_by, order=order)
+
+
+@app.route('/api/runs/<folder>/<path:name>')
+def api_run(folder, name):
+    if name not in list_csv_files(folder):
+        abort(404)
+    points = request.args.get('points', API_POINTS, type=int)
+    df = load_results(folder, name)
+    return jsonify(downsample(df, ['Generation', 'Best Distance', 'Best Fitness', 'Average Fitness'], points))
+
+
+@app.route('/api/compare')
+def api_compare():
+    points = request.args.get('points', API_POINTS, type=int)
+    all_results, _ = comparison_results()
+    return jsonify({folder: downsample(df, ['Generation', 'Best Distance'], points)
+                    for folder, df in all_results.items()})
+
+
+@app.route('/plot/runs/<folder>/<path:name>.png')
+def evolution_png(folder, name):
+    if name not in list_csv_files(folder):
+        abort(404)
+    return cached_png(('evolution', results.version(folder, name)),
+                      lambda: plot_evolution(load_results(folder, name)))
+
+
+@app.route('/plot/compare.png')
+def compare_png():
+    all_results, versions = comparison_results()
+    return cached_png(('compare', tuple(versions)), lambda: plot_comparison(all_results))
+
+@app.route('/live')
+def live():
+    listening = live_feed.listen(DEFAULT_ADDRESS)
+    return render_template('live.html', listening=listening, address=f"{DEFAULT_ADDRESS[0]}:{DEFAULT_ADDRESS[1]}")
+
+
+@app.route('/live/stream')
+def live_stream():
+    live_feed.listen(DEFAULT_ADDRESS)
+    last_id = request.headers.get('Last-Event-ID', type=int)
+    if last_id is None:
+        last_id = max(0, live_feed.sequence - LIVE_BACKLOG)
+
+    def stream(sequence):
+        while True:
+            events = live_feed.since(sequence)
+            if not events:
+                yield ": keep-alive\n\n"
+                continue
+            sequence = events[-1][0]
+            # One SSE message per batch keeps the browser work proportional to the refresh rate
+            yield f"id: {sequence}\ndata: {json.dumps([event for _, event in events])}\n\n"
+
+    return Response(stream(last_id), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    app.run(debug=True, threaded=True)
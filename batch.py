@@ -0,0 +1,132 @@
+import json
+import zlib
+import numpy as np
+from beehive import reproduce_batch
+from fields import make_problem
+from storage import CsvSink
+
+DEFAULT_BATCH_SIZE = 1000  # replicates evolved together (memory: batch_size * pop_size * n_flowers ints)
+
+
+def evolve_batch(rates, flowers, hive, pop_size, n_generations, rng, problem=None, proportion=0.5):
+    """
+    Evolve len(rates) independent replicates at once, replicate r with
+    mutation rate rates[r], as an R x P x N permutation tensor: the
+    run_simulation algorithm (elitist truncation, uniform parents, OX
+    crossover, swap mutation) with every step vectorized over the
+    replicate axis.
+    Returns the (R, n_generations) best distance, best fitness and average
+    fitness of every replicate and generation.
+    """
+    if problem is None:
+        problem = make_problem(flowers, hive)
+    rates = np.asarray(rates, dtype=float)
+    r, p, n = len(rates), pop_size, len(flowers)
+    n_selected = int(p * proportion)
+    n_children = p - n_selected
+    replicates = np.arange(r)[:, None]
+    child_rates = np.repeat(rates, n_children)
+
+    paths = rng.permuted(np.broadcast_to(np.arange(n), (r, p, n)), axis=2)
+    best_distance = np.empty((r, n_generations))
+    best_fitness = np.empty((r, n_generations))
+    avg_fitness = np.empty((r, n_generations))
+    for gen in range(n_generations):
+        distance = problem.distances(paths.reshape(r * p, n)).reshape(r, p)
+        fitness = 1 / distance
+        order = np.argsort(distance, axis=1, kind="stable")
+        best_distance[:, gen] = distance[replicates[:, 0], order[:, 0]]
+        best_fitness[:, gen] = 1 / best_distance[:, gen]
+        avg_fitness[:, gen] = fitness.mean(axis=1)
+        if gen == n_generations - 1:
+            break
+
+        # Elitist selection, then uniform parents among the survivors of each replicate,
+        # as rows of the flattened (R * n_selected, n) survivor matrix
+        selected = paths[replicates, order[:, :n_selected]]
+        first = rng.integers(0, n_selected, size=(r, n_children))
+        second = (first + rng.integers(1, n_selected, size=(r, n_children))) % n_selected
+        pairs = np.stack([first, second], axis=2) + replicates[:, :, None] * n_selected
+        children = reproduce_batch(selected.reshape(-1, n), pairs.reshape(-1, 2), child_rates, rng)
+        paths = np.concatenate([selected, children.reshape(r, n_children, n)], axis=1)
+    return best_distance, best_fitness, avg_fitness
+
+
+def sweep_layout(mutation_rates, repetitions, pop_size, n_generations, seed, batch_size, proportion):
+    """
+    Everything a batch replicate depends on besides the field: recorded with
+    every run, so replay_replicate can re-run its batch.
+    """
+    return {"rates": [float(rate) for rate in mutation_rates], "repetitions": repetitions, "pop_size": pop_size,
+            "n_generations": n_generations, "seed": seed, "batch_size": batch_size, "proportion": proportion}
+
+
+def batch_seeds(seed, n_batches):
+    """Seed of every batch of a sweep, spawned from the sweep seed."""
+    return [int(sequence.generate_state(1)[0]) for sequence in np.random.SeedSequence(seed).spawn(n_batches)]
+
+
+def run_batch(mutation_rates, repetitions, flowers, hive, pop_size, n_generations, seed=1234, sink=None,
+              batch_size=DEFAULT_BATCH_SIZE, proportion=0.5):
+    """
+    Sweep engine for small fields: the repetitions of every mutation rate
+    are evolved together by evolve_batch, batch_size replicates at a time
+    (each batch with its own seed spawned from seed), instead of one
+    run_simulation call per run.
+    Every replicate is written to the sink as a regular run (same rows as
+    run_simulation) with the seed of its batch; its meta holds the sweep
+    layout, the batch and its position in it, which replay_replicate needs.
+    Run ids are batch_<layout digest>_<rate>_<repetition>, the digest
+    telling apart sweeps whose batches are made differently.
+    Returns (replicate_rates, history_best, history_avg, locations), the
+    histories as (R, n_generations) fitness arrays.
+    """
+    if sink is None:
+        sink = CsvSink()
+    problem = make_problem(flowers, hive)
+    layout = sweep_layout(mutation_rates, repetitions, pop_size, n_generations, seed, batch_size, proportion)
+    digest = f"{zlib.crc32(json.dumps(layout, sort_keys=True).encode('utf-8')):08x}"
+    all_rates = np.repeat(np.asarray(mutation_rates, dtype=float), repetitions)
+    starts = range(0, len(all_rates), batch_size)
+
+    history_best = np.empty((len(all_rates), n_generations))
+    history_avg = np.empty((len(all_rates), n_generations))
+    locations = []
+    for batch_index, (start, batch_seed) in enumerate(zip(starts, batch_seeds(seed, len(starts)))):
+        rates = all_rates[start:start + batch_size]
+        best_distance, best_fitness, avg_fitness = evolve_batch(
+            rates, flowers, hive, pop_size, n_generations, np.random.default_rng(batch_seed), problem, proportion)
+        history_best[start:start + len(rates)] = best_fitness
+        history_avg[start:start + len(rates)] = avg_fitness
+        for offset, rate in enumerate(rates.tolist()):
+            rows = _rows(best_distance[offset], best_fitness[offset], avg_fitness[offset])
+            meta = {"n_generations": n_generations, "stop_reason": "max generations",
+                    "stop_generation": n_generations - 1, "engine": "batch", "sweep": layout,
+                    "batch": batch_index, "replicate": offset}
+            run_id = f"batch_{digest}_{rate}_{(start + offset) % repetitions:04d}"
+            locations.append(sink.write_run(run_id, rate, rows, seed=batch_seed, meta=meta))
+        print(f"[Batch] {start + len(rates)}/{len(all_rates)} runs done")
+    sink.flush()
+    return all_rates, history_best, history_avg, locations
+
+
+def replay_replicate(meta, flowers, hive):
+    """
+    Rows of one run of run_batch, from its stored meta: its whole batch is
+    evolved again with the batch seed and the replicate's slice is kept.
+    """
+    layout = meta["sweep"]
+    all_rates = np.repeat(np.asarray(layout["rates"], dtype=float), layout["repetitions"])
+    start = meta["batch"] * layout["batch_size"]
+    batch_seed = batch_seeds(layout["seed"], meta["batch"] + 1)[meta["batch"]]
+    best_distance, best_fitness, avg_fitness = evolve_batch(
+        all_rates[start:start + layout["batch_size"]], flowers, hive, layout["pop_size"], layout["n_generations"],
+        np.random.default_rng(batch_seed), proportion=layout["proportion"])
+    replicate = meta["replicate"]
+    return _rows(best_distance[replicate], best_fitness[replicate], avg_fitness[replicate])
+
+
+def _rows(best_distance, best_fitness, avg_fitness):
+    """Stored rows of one replicate, as run_simulation writes them."""
+    return list(zip(range(len(best_distance)), best_distance.tolist(), best_fitness.tolist(),
+                    avg_fitness.tolist()))
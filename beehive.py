@@ -1,9 +1,14 @@
 import math
 import random
+from collections import OrderedDict
+import numpy as np
 
 BEE_COUNTER = 0
+RESAMPLE_TRIES = 20  # redraws of a clone pair's second parent before the fallback (_resample_equal)
 
 class Bee:
+    __slots__ = ("path", "distance", "fitness", "parents", "id", "generation")
+
     def __init__(self, path, parents=None, generation=0):
         """
         Bee object representing a solution (path through flowers).
@@ -24,6 +29,16 @@ class Bee:
         self.fitness = 1 / self.distance
         return self.fitness
 
+    @property
+    def dirty(self):
+        """True while the path has not been scored (or was changed since)."""
+        return self.fitness is None
+
+    def mark_dirty(self):
+        """Call after editing the path in place."""
+        self.distance = None
+        self.fitness = None
+
 
 
 def calculate_distance(path, flowers, hive):
@@ -40,20 +55,335 @@ def calculate_distance(path, flowers, hive):
     return distance
 
 
-def create_bee(flowers):
+class Problem:
+    def __init__(self, flowers, hive):
+        """
+        Flower field with the hive/flower distance matrix computed once.
+        Index 0 of the matrix is the hive, index i + 1 is flowers[i].
+        """
+        self.flowers = flowers
+        self.hive = hive
+        points = np.array([hive] + list(flowers), dtype=float)
+        diff = points[:, None, :] - points[None, :, :]
+        self.matrix = np.sqrt((diff ** 2).sum(axis=-1))
+        self._rows = None  # nested lists, faster than the array for scalar lookups
+
+    def __len__(self):
+        return len(self.flowers)
+
+    def pair_distance(self, i, j):
+        """Distance between two matrix indices (0 = hive, i + 1 = flowers[i])."""
+        rows = self._rows
+        if rows is None:
+            rows = self._rows = self.matrix.tolist()
+        return rows[i][j]
+
+    def neighbors(self, k):
+        """k nearest other nodes of every matrix index, closest first."""
+        k = min(k, len(self.matrix) - 1)
+        masked = self.matrix + np.diag(np.full(len(self.matrix), np.inf))
+        nearest = np.argpartition(masked, k - 1, axis=1)[:, :k]
+        order = np.take_along_axis(masked, nearest, axis=1).argsort(axis=1)
+        return np.take_along_axis(nearest, order, axis=1).tolist()
+
+    def distance(self, path):
+        """Total distance of a single path, read from the matrix."""
+        return float(self.distances(np.asarray([path]))[0])
+
+    def distances(self, paths):
+        """
+        Total distance of every row of a 2D array of paths (one path per row).
+        """
+        idx = np.asarray(paths, dtype=np.intp) + 1
+        m = self.matrix
+        total = m[0, idx[:, 0]] + m[idx[:, -1], 0]
+        total += m[idx[:, :-1], idx[:, 1:]].sum(axis=1)
+        return total
+
+
+class FitnessCache:
+    def __init__(self, maxsize=100000):
+        """
+        Bounded LRU of tour lengths keyed on a canonical path
+        (a tour and its reverse have the same length), with hit/miss counters.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    @staticmethod
+    def key(path):
+        forward = tuple(path)
+        backward = forward[::-1]
+        return forward if forward <= backward else backward
+
+    def get(self, path):
+        key = self.key(path)
+        distance = self._data.get(key)
+        if distance is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._data.move_to_end(key)
+        return distance
+
+    def put(self, path, distance):
+        key = self.key(path)
+        self._data[key] = distance
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+def evaluate_population(population, flowers, hive, problem=None, cache=None):
+    """
+    Score the dirty bees of a population only (already scored bees are skipped),
+    looking paths up in the cache first. Distances are computed in one
+    vectorized call when a Problem is given.
+    Returns the number of tour lengths actually computed.
+    """
+    pending = []
+    for bee in population:
+        if not bee.dirty:
+            continue
+        distance = cache.get(bee.path) if cache is not None else None
+        if distance is None:
+            pending.append(bee)
+        else:
+            bee.distance = distance
+            bee.fitness = 1 / distance
+
+    if not pending:
+        return 0
+    if problem is not None:
+        distances = problem.distances([bee.path for bee in pending]).tolist()
+    else:
+        distances = [calculate_distance(bee.path, flowers, hive) for bee in pending]
+    for bee, distance in zip(pending, distances):
+        bee.distance = distance
+        bee.fitness = 1 / distance
+        if cache is not None:
+            cache.put(bee.path, distance)
+    return len(pending)
+
+
+def path_dtype(n_flowers):
+    """Smallest integer type able to hold flower indices (int16 up to 32767 flowers)."""
+    return np.int16 if n_flowers <= np.iinfo(np.int16).max else np.int32
+
+
+def _new_ids(count):
+    """count fresh sequential bee ids, from the same counter as Bee."""
+    global BEE_COUNTER
+    ids = np.arange(BEE_COUNTER, BEE_COUNTER + count, dtype=np.int64)
+    BEE_COUNTER += count
+    return ids
+
+
+class Population:
+    def __init__(self, paths, ids=None, generation=0, parents=None, distance=None):
+        """
+        One generation stored as arrays, one row per bee: a compact
+        permutation matrix plus parallel id, generation, parent id (-1 when
+        missing), distance and fitness arrays. A NaN distance marks a bee
+        not scored yet. Without ids, fresh ones are drawn from the Bee
+        counter. Indexing gives BeeView rows with the Bee API.
+        """
+        paths = np.asarray(paths)
+        n_flowers = paths.shape[1] if paths.ndim == 2 else 0
+        self.paths = paths.astype(path_dtype(n_flowers), copy=False).reshape(len(paths), n_flowers)
+        size = len(self.paths)
+        self.ids = _new_ids(size) if ids is None else np.asarray(ids, dtype=np.int64)
+        self.generation = np.broadcast_to(np.asarray(generation, dtype=np.int32), (size,)).copy()
+        self.parents = np.full((size, 2), -1, dtype=np.int64) if parents is None \
+            else np.asarray(parents, dtype=np.int64).reshape(size, 2)
+        self.distance = np.full(size, np.nan) if distance is None else np.asarray(distance, dtype=float)
+        self.fitness = 1 / self.distance
+
+    @classmethod
+    def random(cls, size, n_flowers, rng):
+        """size bees with random paths (rng: a numpy Generator)."""
+        return cls(rng.permuted(np.tile(np.arange(n_flowers, dtype=path_dtype(n_flowers)), (size, 1)), axis=1))
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.take(np.arange(len(self))[index])
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("population index out of range")
+        return BeeView(self, index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield BeeView(self, index)
+
+    @property
+    def dirty(self):
+        """Mask of the bees not scored yet."""
+        return np.isnan(self.distance)
+
+    def evaluate(self, flowers, hive, problem=None, cache=None):
+        """
+        Score the dirty rows only, looking paths up in the cache first and
+        computing the others in one Problem.distances call when a Problem is
+        given. Returns the number of tour lengths actually computed.
+        """
+        rows = np.flatnonzero(self.dirty)
+        if cache is not None and len(rows):
+            found = [cache.get(path) for path in self.paths[rows].tolist()]
+            hits = np.fromiter((d is not None for d in found), dtype=bool, count=len(rows))
+            self.distance[rows[hits]] = [d for d in found if d is not None]
+            rows = rows[~hits]
+        if len(rows):
+            if problem is not None:
+                self.distance[rows] = problem.distances(self.paths[rows])
+            else:
+                self.distance[rows] = [calculate_distance(path, flowers, hive) for path in self.paths[rows].tolist()]
+            if cache is not None:
+                for path, distance in zip(self.paths[rows].tolist(), self.distance[rows].tolist()):
+                    cache.put(path, distance)
+        self.fitness = 1 / self.distance
+        return len(rows)
+
+    def order(self):
+        """Row indices sorted by fitness, best first (stable, like list.sort)."""
+        return np.argsort(-self.fitness, kind="stable")
+
+    def take(self, indices):
+        """New population made of the given rows (same bees, same ids)."""
+        return Population(self.paths[indices], self.ids[indices], self.generation[indices],
+                          self.parents[indices], self.distance[indices])
+
+    def __add__(self, other):
+        return Population(np.concatenate([self.paths, other.paths]), np.concatenate([self.ids, other.ids]),
+                          np.concatenate([self.generation, other.generation]),
+                          np.concatenate([self.parents, other.parents]),
+                          np.concatenate([self.distance, other.distance]))
+
+    def offspring(self, pairs, rate, rng):
+        """
+        One child per (first, second) row pair: vectorized OX crossover and
+        swap mutation (reproduce_batch), fresh ids, parent ids and generation.
+        """
+        pairs = np.asarray(pairs, dtype=np.intp).reshape(-1, 2)
+        paths = reproduce_batch(self.paths, pairs, rate, rng) if len(pairs) else self.paths[:0]
+        return Population(paths, generation=self.generation[pairs].max(axis=1) + 1, parents=self.ids[pairs])
+
+
+class BeeView:
+    """
+    Thin read/write view on one row of a Population, exposing the Bee API
+    (for the code that works bee by bee, e.g. local search).
+    """
+    __slots__ = ("_population", "_index")
+
+    def __init__(self, population, index):
+        self._population = population
+        self._index = index
+
+    @property
+    def path(self):
+        return self._population.paths[self._index].tolist()
+
+    @path.setter
+    def path(self, path):
+        self._population.paths[self._index] = path
+
+    @property
+    def id(self):
+        return int(self._population.ids[self._index])
+
+    @property
+    def generation(self):
+        return int(self._population.generation[self._index])
+
+    @property
+    def parents(self):
+        return [int(pid) for pid in self._population.parents[self._index] if pid >= 0]
+
+    @property
+    def distance(self):
+        value = self._population.distance[self._index]
+        return None if np.isnan(value) else float(value)
+
+    @distance.setter
+    def distance(self, value):
+        self._population.distance[self._index] = np.nan if value is None else value
+
+    @property
+    def fitness(self):
+        value = self._population.fitness[self._index]
+        return None if np.isnan(value) else float(value)
+
+    @fitness.setter
+    def fitness(self, value):
+        self._population.fitness[self._index] = np.nan if value is None else value
+
+    @property
+    def dirty(self):
+        return self.fitness is None
+
+    def mark_dirty(self):
+        self.distance = None
+        self.fitness = None
+
+    def to_bee(self):
+        """Detached Bee with the same id, path and scores."""
+        bee = Bee.__new__(Bee)
+        bee.path = self.path
+        bee.distance = self.distance
+        bee.fitness = self.fitness
+        bee.parents = self.parents
+        bee.id = self.id
+        bee.generation = self.generation
+        return bee
+
+
+def diversity(population):
+    """Share of distinct paths in a population (a Population or a list of bees)."""
+    if isinstance(population, Population):
+        return len(np.unique(population.paths, axis=0)) / len(population)
+    return len({tuple(bee.path) for bee in population}) / len(population)
+
+
+def new_seed():
+    """Fresh 63-bit run seed, drawn from the global random module."""
+    return random.getrandbits(63)
+
+
+def run_rngs(seed):
+    """
+    Independent generators of one run, both derived from its seed through a
+    SeedSequence: a random.Random for the per-bee operators and a numpy
+    Generator for the vectorized ones. Same seed, same run.
+    """
+    python_stream, numpy_stream = np.random.SeedSequence(seed).spawn(2)
+    return random.Random(int(python_stream.generate_state(1, np.uint64)[0])), np.random.default_rng(numpy_stream)
+
+
+def create_bee(flowers, rng=random):
     """
     Create a bee with a random path (permutation of flower indices).
+    rng is the run's random.Random (default: the global random module).
     """
     indices = list(range(len(flowers)))
-    random.shuffle(indices)
+    rng.shuffle(indices)
     return Bee(indices)
 
 
-def generate_population(size, flowers):
+def generate_population(size, flowers, rng=random):
     """
     Generate the initial population of bees.
     """
-    return [create_bee(flowers) for _ in range(size)]
+    return [create_bee(flowers, rng) for _ in range(size)]
 
 
 def selection(population, proportion=0.5):
@@ -64,29 +394,269 @@ def selection(population, proportion=0.5):
     return population[:size]
 
 
-def crossover(parent1, parent2):
-    n = len(parent1.path)
-    start, end = sorted(random.sample(range(n), 2))
+def truncation(fitness, size):
+    """
+    Indices of the `size` fittest bees in O(n) (argpartition, no full sort),
+    the single best one first.
+    """
+    fitness = np.asarray(fitness)
+    if size >= len(fitness):
+        top = np.arange(len(fitness))
+    else:
+        top = np.argpartition(-fitness, size - 1)[:size]
+    best = np.argmax(fitness[top])
+    top[[0, best]] = top[[best, 0]]
+    return top
+
+
+def uniform_pairs(n, n_pairs, rng):
+    """Two distinct parents drawn uniformly among n bees, for every child."""
+    first = rng.integers(0, n, size=n_pairs)
+    second = (first + rng.integers(1, n, size=n_pairs)) % n
+    return np.stack([first, second], axis=1)
+
+
+def _resample_equal(pairs, draw, fitness, tries=RESAMPLE_TRIES):
+    """
+    Redraw the second parent of every pair made of the same bee twice (an OX
+    clone), at most tries times; a pair still made of one bee then gets the
+    fittest other bee (with two bees: the other one).
+    """
+    same = pairs[:, 0] == pairs[:, 1]
+    for _ in range(tries):
+        if not same.any():
+            return pairs
+        pairs[same, 1] = draw(int(same.sum()))
+        same = pairs[:, 0] == pairs[:, 1]
+    if same.any():
+        best, runner_up = np.argsort(-np.asarray(fitness), kind="stable")[:2]
+        pairs[same, 1] = np.where(pairs[same, 0] == best, runner_up, best)
+    return pairs
+
+
+def tournament_pairs(fitness, n_pairs, rng, k=3):
+    """k-tournament: each parent is the fittest of k bees drawn at random (two distinct parents)."""
+    fitness = np.asarray(fitness)
+
+    def winners(shape):
+        contestants = rng.integers(0, len(fitness), size=shape + (k,))
+        best = np.argmax(fitness[contestants], axis=-1)
+        return np.take_along_axis(contestants, best[..., None], axis=-1)[..., 0]
+
+    pairs = winners((n_pairs, 2))
+    return _resample_equal(pairs, lambda m: winners((m,)), fitness) if len(fitness) > 1 else pairs
+
+
+def rank_pairs(fitness, n_pairs, rng, pressure=1.5):
+    """
+    Linear rank selection: probability grows linearly with rank,
+    pressure in [1, 2] is the expected number of copies of the best bee.
+    The second parent is redrawn while it is the first one, unless a single
+    bee has a non-zero weight (two bees with pressure 2): it then takes the
+    other bee directly.
+    """
+    fitness = np.asarray(fitness)
+    n = len(fitness)
+    ranks = np.empty(n)
+    ranks[np.argsort(fitness, kind="stable")] = np.arange(n)
+    weights = (2 - pressure) / n + 2 * ranks * (pressure - 1) / (n * max(n - 1, 1))
+    p = weights / weights.sum()
+    pairs = rng.choice(n, size=(n_pairs, 2), p=p)
+    if n < 2:
+        return pairs
+    tries = RESAMPLE_TRIES if np.count_nonzero(p) > 1 else 0
+    return _resample_equal(pairs, lambda m: rng.choice(n, size=m, p=p), fitness, tries)
+
+
+def sus_pairs(fitness, n_pairs, rng):
+    """
+    Stochastic universal sampling: 2 * n_pairs evenly spaced pointers on the
+    fitness wheel, shuffled into pairs. A pair made of the same bee twice
+    swaps its second parent with another pair when possible (the counts of
+    the sampling are kept), otherwise redraws it proportionally to fitness.
+    """
+    fitness = np.asarray(fitness, dtype=float)
+    n = len(fitness)
+    count = 2 * n_pairs
+    wheel = np.cumsum(fitness)
+    step = wheel[-1] / count
+    pointers = rng.uniform(0, step) + step * np.arange(count)
+    chosen = np.minimum(np.searchsorted(wheel, pointers, side="right"), n - 1)
+    pairs = rng.permutation(chosen).reshape(n_pairs, 2)
+    if n < 2:
+        return pairs
+    for i in np.flatnonzero(pairs[:, 0] == pairs[:, 1]):
+        bee = pairs[i, 0]
+        partners = np.flatnonzero((pairs[:, 0] != bee) & (pairs[:, 1] != bee))
+        if len(partners):
+            j = partners[rng.integers(len(partners))]
+            pairs[i, 1], pairs[j, 1] = pairs[j, 1], pairs[i, 1]
+    return _resample_equal(pairs, lambda m: rng.choice(n, size=m, p=fitness / wheel[-1]), fitness)
+
 
+class Selection:
+    PARENT_SCHEMES = ("uniform", "tournament", "rank", "sus")
+
+    def __init__(self, parents="uniform", proportion=0.5, tournament_size=3, pressure=1.5, rng=None):
+        """
+        Survivors by O(n) truncation (the fittest `proportion` of the bees),
+        then the parent index pairs of the whole generation drawn in one
+        vectorized call among them: uniform, k-tournament, linear rank or
+        stochastic universal sampling.
+        """
+        if parents not in self.PARENT_SCHEMES:
+            raise ValueError(f"Unknown parent selection: {parents}")
+        if not 1 <= pressure <= 2:
+            raise ValueError(f"Rank selection pressure must be in [1, 2], got {pressure}")
+        self.parents = parents
+        self.proportion = proportion
+        self.tournament_size = tournament_size
+        self.pressure = pressure
+        self.rng = rng if rng is not None else np.random.default_rng(random.getrandbits(64))
+
+    def select(self, population, pop_size, rng=None):
+        """
+        Returns the survivors (best bee first; a Population when given one)
+        and a (pop_size - len(survivors), 2) array of parent indices into them. rng (a numpy Generator) overrides
+        the scheme's own generator, e.g. with the stream of the current run.
+        """
+        rng = rng if rng is not None else self.rng
+        if isinstance(population, Population):
+            fitness = population.fitness
+        else:
+            fitness = np.fromiter((b.fitness for b in population), dtype=float, count=len(population))
+        size = max(2, int(len(population) * self.proportion))
+        n_children = max(0, pop_size - size)
+        top = truncation(fitness, size)
+        if isinstance(population, Population):
+            survivors = population.take(top)
+        else:
+            survivors = [population[i] for i in top]
+        survivor_fitness = fitness[top]
+        if self.parents == "tournament":
+            pairs = tournament_pairs(survivor_fitness, n_children, rng, self.tournament_size)
+        elif self.parents == "rank":
+            pairs = rank_pairs(survivor_fitness, n_children, rng, self.pressure)
+        elif self.parents == "sus":
+            pairs = sus_pairs(survivor_fitness, n_children, rng)
+        else:
+            pairs = uniform_pairs(len(survivors), n_children, rng)
+        return survivors, pairs
+
+
+def order_crossover(path1, path2, start, end):
+    """
+    OX on two paths: keep path1[start:end], fill the rest with the genes of
+    path2 in order, starting after the segment. Linear time (membership mask).
+    """
+    n = len(path1)
     child_path = [None] * n
-    child_path[start:end] = parent1.path[start:end]
+    child_path[start:end] = path1[start:end]
+
+    used = [False] * n
+    for gene in path1[start:end]:
+        used[gene] = True
 
     pos = end
-    for gene in parent2.path:
-        if gene not in child_path:
+    for gene in path2:
+        if not used[gene]:
             if pos >= n:
                 pos = 0
             child_path[pos] = gene
             pos += 1
+    return child_path
+
+
+def swap_mutation(path, rate=0.05, rng=random):
+    """Swap two flowers of the path in place with probability rate."""
+    if rng.random() < rate:
+        i, j = rng.sample(range(len(path)), 2)
+        path[i], path[j] = path[j], path[i]
+    return path
+
 
+def crossover(parent1, parent2, rng=random):
+    n = len(parent1.path)
+    start, end = sorted(rng.sample(range(n), 2))
+    child_path = order_crossover(parent1.path, parent2.path, start, end)
     child_gen = max(parent1.generation, parent2.generation) + 1
     return Bee(child_path, parents=[parent1.id, parent2.id], generation=child_gen)
 
 
-def mutation(bee, rate=0.05):
-    path = bee.path[:]
-    if random.random() < rate:
-        i, j = random.sample(range(len(path)), 2)
-        path[i], path[j] = path[j], path[i]
+def mutation(bee, rate=0.05, rng=random):
+    path = swap_mutation(bee.path[:], rate, rng)
     child_gen = bee.generation + 1
     return Bee(path, parents=[bee.id], generation=child_gen)
+
+
+def reproduce(selected, n_children, rate=0.05, pairs=None, rng=random):
+    """
+    Build a whole generation of offspring in one call: two parents (random,
+    or the given (n_children, 2) index pairs into selected), OX crossover and
+    swap mutation applied in place (one Bee per child).
+    """
+    n = len(selected[0].path)
+    if pairs is not None:
+        pairs = np.asarray(pairs).tolist()
+    offspring = []
+    for c in range(n_children):
+        if pairs is None:
+            parent1, parent2 = rng.sample(selected, 2)
+        else:
+            parent1, parent2 = selected[pairs[c][0]], selected[pairs[c][1]]
+        start, end = sorted(rng.sample(range(n), 2))
+        path = swap_mutation(order_crossover(parent1.path, parent2.path, start, end), rate, rng)
+        child_gen = max(parent1.generation, parent2.generation) + 1
+        offspring.append(Bee(path, parents=[parent1.id, parent2.id], generation=child_gen))
+    return offspring
+
+
+def order_crossover_batch(parents1, parents2, rng):
+    """
+    Vectorized OX: one child per row of the two (C, n) parent arrays.
+    """
+    parents1 = np.asarray(parents1)
+    parents2 = np.asarray(parents2)
+    c, n = parents1.shape
+    rows = np.arange(c)[:, None]
+    # Two distinct cut points per child, start < end
+    a = rng.integers(0, n, size=c)
+    b = (a + rng.integers(1, n, size=c)) % n
+    start = np.minimum(a, b)[:, None]
+    end = np.maximum(a, b)[:, None]
+
+    positions = np.arange(n)
+    segment = (positions >= start) & (positions < end)
+    children = np.where(segment, parents1, 0)
+
+    # used[c, gene] is True when gene is inside the kept segment of child c
+    used = np.zeros((c, n), dtype=bool)
+    np.put_along_axis(used, parents1, segment, axis=1)
+    keep = ~np.take_along_axis(used, parents2, axis=1)
+
+    # k-th kept gene of parent2 goes to position (end + k) % n
+    rank = np.cumsum(keep, axis=1) - 1
+    target = (end + rank) % n
+    children[np.broadcast_to(rows, (c, n))[keep], target[keep]] = parents2[keep]
+    return children
+
+
+def swap_mutation_batch(paths, rate, rng):
+    """Vectorized swap mutation, in place: each row mutates with probability rate."""
+    c, n = paths.shape
+    mutate = np.flatnonzero(rng.random(c) < rate)
+    i = rng.integers(0, n, size=len(mutate))
+    j = (i + rng.integers(1, n, size=len(mutate))) % n
+    paths[mutate, i], paths[mutate, j] = paths[mutate, j], paths[mutate, i]
+    return paths
+
+
+def reproduce_batch(paths, parent_pairs, rate, rng):
+    """
+    Vectorized reproduction on a permutation matrix: parent_pairs is a (C, 2)
+    array of row indices and rate a mutation rate or one per child; returns
+    the (C, n) offspring paths.
+    """
+    parent_pairs = np.asarray(parent_pairs)
+    children = order_crossover_batch(paths[parent_pairs[:, 0]], paths[parent_pairs[:, 1]], rng)
+    return swap_mutation_batch(children, rate, rng)
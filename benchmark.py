@@ -0,0 +1,172 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+import beehive
+from beehive import (Population, Problem, calculate_distance, crossover, generate_population, mutation,
+                     run_rngs, selection, uniform_pairs)
+from fields import random_field
+from simulation import run_simulation
+from storage import MemorySink
+
+FLOWER_COUNTS = [20, 200, 2000]
+POP_SIZES = [100, 1000]
+RUN_GENERATIONS = 20
+DEFAULT_BASELINE = os.path.join("data", "benchmark_baseline.json")
+DEFAULT_THRESHOLD = 0.15  # slower than baseline by more than 15% = regression
+
+
+def _generation(population, problem, pop_size, rate, rng):
+    """One generation of the run_simulation loop (default operators)."""
+    population.evaluate(problem.flowers, problem.hive, problem)
+    population = population.take(population.order())
+    selected = selection(population, proportion=0.5)
+    return selected + selected.offspring(uniform_pairs(len(selected), pop_size - len(selected), rng), rate, rng)
+
+
+def cases(flower_counts=FLOWER_COUNTS, pop_sizes=POP_SIZES, run_generations=RUN_GENERATIONS):
+    """
+    (name, setup, work, units) of every benchmark. setup() builds fresh
+    inputs, work(inputs) is the timed call and units is the number of
+    evaluations (or operator calls) it performs.
+    """
+    for n in flower_counts:
+        flowers, hive = random_field(n, seed=n)
+        problem = Problem(flowers, hive)
+        rng, np_rng = run_rngs(n)
+        path = list(range(n))
+        parents = generate_population(2, flowers, rng)
+
+        yield (f"calculate_distance/n={n}", lambda: path,
+               lambda p, flowers=flowers, hive=hive: calculate_distance(p, flowers, hive), 1)
+        yield (f"crossover/n={n}", lambda: parents,
+               lambda p, rng=rng: crossover(p[0], p[1], rng), 1)
+        yield (f"mutation/n={n}", lambda: parents[0],
+               lambda bee, rng=rng: mutation(bee, 1.0, rng), 1)
+
+        for pop_size in pop_sizes:
+            def fresh_population(pop_size=pop_size, n=n, rng=np_rng):
+                return Population.random(pop_size, n, rng)
+
+            # Population.evaluate is what run_simulation scores every generation with
+            yield (f"evaluate/n={n}/pop={pop_size}", fresh_population,
+                   lambda population, problem=problem: population.evaluate(problem.flowers, problem.hive, problem),
+                   pop_size)
+            yield (f"generation/n={n}/pop={pop_size}", fresh_population,
+                   lambda population, problem=problem, pop_size=pop_size, rng=np_rng:
+                   _generation(population, problem, pop_size, 0.05, rng), pop_size)
+            yield (f"run_simulation/n={n}/pop={pop_size}/gens={run_generations}", lambda: None,
+                   lambda _, flowers=flowers, hive=hive, problem=problem, pop_size=pop_size:
+                   run_simulation(0.05, flowers, hive, pop_size, run_generations, problem=problem,
+                                  verbose=False, sink=MemorySink(), seed=1234),
+                   pop_size * run_generations)
+
+
+def measure(setup, work, units, min_time=0.5, repeat=7):
+    """
+    Best wall time per call over `repeat` rounds (each round loops long
+    enough to last about min_time / repeat), throughput in units per second
+    and peak traced memory of one call, measured in a separate pass so
+    tracemalloc does not slow down the timings.
+    """
+    inputs = setup()
+    start = time.perf_counter()
+    work(inputs)
+    once = time.perf_counter() - start
+    number = max(1, int(min_time / repeat / max(once, 1e-9)))
+    best = once
+    for _ in range(repeat if once < min_time else 1):
+        batch = [setup() for _ in range(number)]
+        start = time.perf_counter()
+        for inputs in batch:
+            work(inputs)
+        best = min(best, (time.perf_counter() - start) / number)
+
+    inputs = setup()
+    tracemalloc.start()
+    work(inputs)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"seconds": best, "per_second": units / best, "peak_bytes": peak}
+
+
+def run_benchmarks(only=None, **kwargs):
+    """Run the benchmarks whose name contains `only` (all by default)."""
+    results = {}
+    for name, setup, work, units in cases(**kwargs):
+        if only and only not in name:
+            continue
+        beehive.BEE_COUNTER = 0
+        random.seed(0)
+        results[name] = measure(setup, work, units)
+        r = results[name]
+        print(f"{name:45s} {r['seconds'] * 1e3:12.4f} ms {r['per_second']:14.0f} /s "
+              f"{r['peak_bytes'] / 1024:10.1f} KiB")
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Names of the benchmarks slower than their baseline by more than threshold."""
+    regressions = []
+    for name, r in results.items():
+        reference = baseline.get("results", {}).get(name)
+        if reference is None:
+            continue
+        ratio = r["seconds"] / reference["seconds"]
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            print(f"REGRESSION {name}: {ratio:.2f}x baseline "
+                  f"({reference['seconds'] * 1e3:.4f} ms -> {r['seconds'] * 1e3:.4f} ms)")
+    return regressions
+
+
+def load_baseline(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(path, results):
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    baseline = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks of the GA hot paths.")
+    parser.add_argument("--only", help="run only the benchmarks whose name contains this text")
+    parser.add_argument("--flowers", type=int, nargs="+", default=FLOWER_COUNTS)
+    parser.add_argument("--pop", type=int, nargs="+", default=POP_SIZES)
+    parser.add_argument("--generations", type=int, default=RUN_GENERATIONS,
+                        help="generations of the run_simulation benchmarks")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="JSON baseline file")
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown reported as a regression")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.only, flower_counts=args.flowers, pop_sizes=args.pop,
+                             run_generations=args.generations)
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save:
+        regressions = compare(results, load_baseline(args.baseline), args.threshold)
+        print(f"{len(regressions)} regression(s) against {args.baseline}")
+    if args.save:
+        save_baseline(args.baseline, results)
+        print(f"Baseline saved in: {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+import json
+import os
+import zlib
+import numpy as np
+from beehive import Population, path_dtype
+
+DEFAULT_CHECKPOINT_DIR = os.path.join("data", "checkpoints")
+DEFAULT_LEDGER_DIR = os.path.join("data", "sweeps")
+
+
+def config_digest(config):
+    """Short digest of a sweep configuration (a JSON dict, see runner.sweep_config)."""
+    return f"{zlib.crc32(json.dumps(config, sort_keys=True).encode('utf-8')):08x}"
+
+
+def ledger_path(config, ledger_dir=DEFAULT_LEDGER_DIR):
+    """Ledger of one sweep configuration: sweeps with other settings never share it."""
+    return os.path.join(ledger_dir, f"ledger_{config_digest(config)}.jsonl")
+
+
+def checkpoint_path(run_id, checkpoint_dir=DEFAULT_CHECKPOINT_DIR):
+    return os.path.join(checkpoint_dir, f"{run_id}.npz")
+
+
+def save_checkpoint(path, generation, population, rng, np_rng, history_best, history_avg, rows,
+                    best_distances, seed=None):
+    """
+    Snapshot of a run between two generations: population paths as one
+    compact int array, state of both random streams, generation reached and
+    the history so far. Written to a temporary file then renamed, so a
+    crash never leaves a truncated checkpoint.
+    """
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    state = {
+        "generation": generation,
+        "seed": seed,
+        "rng": rng.getstate(),
+        "np_rng": np_rng.bit_generator.state,
+        "history_best": history_best,
+        "history_avg": history_avg,
+        "rows": rows,
+        "best_distances": best_distances,
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f,
+                 paths=population.paths,
+                 generations=population.generation,
+                 state=np.array(json.dumps(state)))
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path):
+    """
+    Read a checkpoint written by save_checkpoint. Returns its state dict,
+    with the population (an unscored Population, in its saved order) under
+    "population" and the random states ready for Random.setstate and
+    bit_generator.state, or None when there is no checkpoint at path.
+    """
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        state = json.loads(str(data["state"]))
+        paths = data["paths"]
+        generations = data["generations"]
+    version, internal, gauss = state["rng"]
+    state["rng"] = (version, tuple(internal), gauss)
+    state["rows"] = [tuple(row) for row in state["rows"]]
+    state["population"] = Population(paths, generation=generations)
+    return state
+
+
+def remove_checkpoint(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class SweepLedger:
+    def __init__(self, path, config=None):
+        """
+        Append-only record of the sweep cells already stored, one JSON line
+        per finished (rate, repetition, seed), after a first line holding the
+        sweep configuration. A restarted sweep skips them; cells cut short
+        resume from their checkpoint. Opening it with another configuration
+        raises ValueError (see claim).
+        """
+        self.path = path
+        self.config = None
+        self._done = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # last line cut by a crash
+                    if "config" in entry:
+                        self.config = entry["config"]
+                    else:
+                        self._done.add((float(entry["rate"]), entry["repetition"], entry["seed"]))
+        if config is not None:
+            self.claim(config)
+
+    def claim(self, config):
+        """
+        Check that the ledger belongs to the sweep configuration config (a new
+        ledger records it): its cells would not be runs of another one.
+        """
+        config = json.loads(json.dumps(config))
+        if self.config is None and not self._done:
+            self._append([{"config": config}])
+            self.config = config
+        elif self.config != config:
+            raise ValueError(f"Sweep ledger {self.path} was made by another sweep configuration "
+                             f"({self.config}), not {config}")
+
+    def done(self, rate, repetition, seed):
+        return (float(rate), repetition, seed) in self._done
+
+    def mark(self, rate, repetition, seed, run_id):
+        self.mark_many([(rate, repetition, seed, run_id)])
+
+    def mark_many(self, cells):
+        """Record several (rate, repetition, seed, run_id) cells with a single fsync."""
+        if not cells:
+            return
+        self._append({"rate": rate, "repetition": repetition, "seed": seed, "run_id": run_id}
+                     for rate, repetition, seed, run_id in cells)
+        self._done.update((float(rate), repetition, seed) for rate, repetition, seed, _ in cells)
+
+    def __len__(self):
+        return len(self._done)
+
+    def _append(self, entries):
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(entry) + "\n" for entry in entries)
+            f.flush()
+            os.fsync(f.fileno())
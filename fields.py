@@ -0,0 +1,199 @@
+import csv
+import math
+import random
+from functools import lru_cache
+import numpy as np
+from beehive import Problem
+
+DENSE_LIMIT = 2000  # above this many flowers the distance matrix is not built
+
+
+def random_field(n_flowers, seed=None, size=1000, hive=None):
+    """
+    Random flower field in a size x size square (integer coordinates, like the
+    default field); the hive defaults to the centre.
+    """
+    rng = random.Random(seed)
+    flowers = [(rng.randint(0, size), rng.randint(0, size)) for _ in range(n_flowers)]
+    if hive is None:
+        hive = (size // 2, size // 2)
+    return flowers, hive
+
+
+def load_tsplib(path):
+    """
+    Load a TSPLIB file (NODE_COORD_SECTION, EUC_2D style coordinates).
+    The first node is used as the hive, the others are the flowers.
+    """
+    points = []
+    in_section = False
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("NODE_COORD_SECTION"):
+                in_section = True
+                continue
+            if line == "EOF" or (in_section and not line[0].isdigit()):
+                if in_section:
+                    break
+                continue
+            if in_section:
+                _, x, y = line.split()[:3]
+                points.append((float(x), float(y)))
+    if len(points) < 2:
+        raise ValueError(f"No node coordinates found in {path}")
+    return points[1:], points[0]
+
+
+def load_coordinates(path, hive=None):
+    """
+    Load flowers from a CSV file of x;y (or x,y) rows, with an optional header.
+    Without an explicit hive, the first row is the hive.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        sample = f.read(2048)
+        f.seek(0)
+        delimiter = ";" if sample.count(";") >= sample.count(",") else ","
+        points = []
+        for row in csv.reader(f, delimiter=delimiter):
+            if len(row) < 2:
+                continue
+            try:
+                points.append((float(row[0]), float(row[1])))
+            except ValueError:
+                continue  # header line
+    if hive is None:
+        if len(points) < 2:
+            raise ValueError(f"No coordinates found in {path}")
+        return points[1:], points[0]
+    return points, hive
+
+
+def load_field(path):
+    """Pick the loader from the file extension (.tsp or CSV)."""
+    if str(path).lower().endswith(".tsp"):
+        return load_tsplib(path)
+    return load_coordinates(path)
+
+
+class SpatialIndex:
+    def __init__(self, points, points_per_cell=2):
+        """
+        Uniform grid over 2D points, for nearest-neighbour queries without
+        an n x n distance matrix.
+        """
+        self.points = np.asarray(points, dtype=float)
+        n = len(self.points)
+        self.low = self.points.min(axis=0)
+        extent = np.maximum(self.points.max(axis=0) - self.low, 1e-9)
+        self.cells = max(1, int(math.sqrt(n / points_per_cell)))
+        self.cell_size = extent / self.cells
+        coords = self._cell_of(self.points)
+        keys = coords[:, 0] * self.cells + coords[:, 1]
+        order = np.argsort(keys, kind="stable")
+        self._order = order
+        self._starts = np.searchsorted(keys[order], np.arange(self.cells * self.cells + 1))
+
+    def _cell_of(self, points):
+        coords = ((points - self.low) / self.cell_size).astype(int)
+        return np.clip(coords, 0, self.cells - 1)
+
+    def _cell_members(self, cx, cy):
+        key = cx * self.cells + cy
+        return self._order[self._starts[key]:self._starts[key + 1]]
+
+    def nearest(self, index, k):
+        """k nearest other points of points[index], closest first."""
+        point = self.points[index]
+        cx, cy = self._cell_of(point[None, :])[0]
+        candidates = []
+        ring = 0
+        k = min(k, len(self.points) - 1)
+        while True:
+            for x in range(cx - ring, cx + ring + 1):
+                for y in range(cy - ring, cy + ring + 1):
+                    if max(abs(x - cx), abs(y - cy)) != ring or not (0 <= x < self.cells and 0 <= y < self.cells):
+                        continue
+                    candidates.append(self._cell_members(x, y))
+            members = np.concatenate(candidates) if candidates else np.empty(0, dtype=int)
+            members = members[members != index]
+            # Points outside the scanned rings are at least ring * cell_size away
+            reach = ring * self.cell_size.min()
+            if len(members) >= k:
+                dist = np.hypot(*(self.points[members] - point).T)
+                nearest = np.argsort(dist, kind="stable")[:k]
+                if dist[nearest[-1]] <= reach or ring >= self.cells:
+                    return members[nearest].tolist()
+            elif ring >= self.cells:
+                dist = np.hypot(*(self.points[members] - point).T)
+                return members[np.argsort(dist, kind="stable")].tolist()
+            ring += 1
+
+    def knn(self, k):
+        """Nearest-neighbour candidate lists of every point."""
+        return [self.nearest(i, k) for i in range(len(self.points))]
+
+
+class LargeProblem(Problem):
+    def __init__(self, flowers, hive, cache_size=1 << 20, chunk_size=256):
+        """
+        Problem for large fields: no (n+1) x (n+1) matrix. Path lengths are
+        computed from the coordinates in row chunks, pair distances on demand
+        through a bounded LRU, neighbour lists from a SpatialIndex.
+        """
+        self.flowers = flowers
+        self.hive = hive
+        self.points = np.array([hive] + list(flowers), dtype=float)
+        self.chunk_size = chunk_size
+        self.index = SpatialIndex(self.points)
+        coords = self.points.tolist()
+
+        @lru_cache(maxsize=cache_size)
+        def pair(i, j):
+            a, b = coords[i], coords[j]
+            return math.hypot(a[0] - b[0], a[1] - b[1])
+
+        self._pair = pair
+
+    def pair_distance(self, i, j):
+        return self._pair(i, j) if i < j else self._pair(j, i)
+
+    def distances(self, paths):
+        paths = np.asarray(paths, dtype=np.intp)
+        total = np.empty(len(paths))
+        hive = self.points[0]
+        for start in range(0, len(paths), self.chunk_size):
+            tours = self.points[paths[start:start + self.chunk_size] + 1]
+            legs = np.hypot(*np.moveaxis(np.diff(tours, axis=1), -1, 0)).sum(axis=1)
+            legs += np.hypot(*(tours[:, 0] - hive).T) + np.hypot(*(tours[:, -1] - hive).T)
+            total[start:start + len(tours)] = legs
+        return total
+
+    def neighbors(self, k):
+        return self.index.knn(k)
+
+
+def make_problem(flowers, hive, dense_limit=DENSE_LIMIT):
+    """Dense Problem for small fields, LargeProblem beyond dense_limit flowers."""
+    if len(flowers) > dense_limit:
+        return LargeProblem(flowers, hive)
+    return Problem(flowers, hive)
+
+
+_worker_field = None  # (flowers, hive, problem) of this process, see init_worker_field
+
+
+def init_worker_field(flowers, hive):
+    """
+    Pool initializer: set the field of a worker process and build its
+    problem once, so tasks neither carry the field nor rebuild the problem.
+    """
+    global _worker_field
+    _worker_field = (flowers, hive, make_problem(flowers, hive))
+
+
+def worker_field():
+    """(flowers, hive, problem) set by init_worker_field in this process."""
+    return _worker_field
@@ -0,0 +1,152 @@
+import random
+from collections import deque
+import numpy as np
+from beehive import Population
+
+
+class Genealogy:
+    def __init__(self, prune_every=32):
+        """
+        Parent-id edges of every bee, stored as one array chunk per generation.
+        Lineages without living descendants are dropped by prune(), so memory
+        stays proportional to the ancestry of the current population.
+        step() prunes every prune_every generations (0: never): a prune walks
+        every stored chunk, so pruning each generation costs far more than
+        the GA itself, while 32 keeps the overhead small and memory within
+        32 generations of the pruned ancestry.
+        """
+        self.prune_every = prune_every
+        self.ids = []          # chunks of int64 bee ids (increasing)
+        self.parents = []      # chunks of (n, 2) int64 parent ids, -1 when missing
+        self.generations = []  # chunks of int32 generation labels
+        self._recorded = 0
+
+    def record(self, bees):
+        """Append the edges of newly created bees (a Population or a list of bees)."""
+        if not len(bees):
+            return
+        if isinstance(bees, Population):
+            self.ids.append(bees.ids.copy())
+            self.parents.append(bees.parents.copy())
+            self.generations.append(bees.generation.copy())
+            return
+        parents = np.full((len(bees), 2), -1, dtype=np.int64)
+        for row, bee in enumerate(bees):
+            parents[row, :len(bee.parents)] = bee.parents[:2]
+        self.ids.append(np.fromiter((bee.id for bee in bees), dtype=np.int64, count=len(bees)))
+        self.parents.append(parents)
+        self.generations.append(np.fromiter((bee.generation for bee in bees), dtype=np.int32, count=len(bees)))
+
+    def step(self, population):
+        """Call once per generation with the living population; prunes every prune_every calls."""
+        self._recorded += 1
+        if self.prune_every and self._recorded % self.prune_every == 0:
+            self.prune(population.ids if isinstance(population, Population) else [bee.id for bee in population])
+
+    def prune(self, alive_ids):
+        """
+        Mark-and-sweep from the living bees: walk chunks newest to oldest
+        (parents are always older than their children) and keep only ancestors.
+        Ids increase across chunks, so marking is a binary search into them.
+        """
+        if not self.ids:
+            return
+        ids = np.concatenate(self.ids)
+        parents = np.concatenate(self.parents)
+        generations = np.concatenate(self.generations)
+        bounds = np.cumsum([0] + [len(chunk) for chunk in self.ids])
+        keep = np.zeros(len(ids), dtype=bool)
+
+        def mark(targets):
+            targets = targets[targets >= 0]
+            rows = np.minimum(np.searchsorted(ids, targets), len(ids) - 1)
+            keep[rows[ids[rows] == targets]] = True
+
+        mark(np.asarray(alive_ids, dtype=np.int64))
+        for i in range(len(self.ids) - 1, -1, -1):
+            start, end = bounds[i], bounds[i + 1]
+            kept = keep[start:end]
+            if kept.any():
+                mark(parents[start:end][kept].ravel())
+        self.ids, self.parents, self.generations = [], [], []
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            kept = keep[start:end]
+            if kept.any():
+                self.ids.append(ids[start:end][kept])
+                self.parents.append(parents[start:end][kept])
+                self.generations.append(generations[start:end][kept])
+
+    def ancestry(self, bee_id, max_depth=None):
+        """
+        Iterative (breadth-first) ancestry of one bee, no recursion limit.
+        Yields (id, generation, parent_ids) for every known ancestor, the bee first.
+        """
+        if not self.ids:
+            return
+        ids = np.concatenate(self.ids)
+        parents = np.concatenate(self.parents)
+        generations = np.concatenate(self.generations)
+        seen = {bee_id}
+        queue = deque([(bee_id, 0)])
+        while queue:
+            current, depth = queue.popleft()
+            row = np.searchsorted(ids, current)
+            if row >= len(ids) or ids[row] != current:
+                continue
+            parent_ids = [int(pid) for pid in parents[row] if pid >= 0]
+            yield int(current), int(generations[row]), parent_ids
+            if max_depth is not None and depth >= max_depth:
+                continue
+            for pid in parent_ids:
+                if pid not in seen:
+                    seen.add(pid)
+                    queue.append((pid, depth + 1))
+
+    def sample_ancestry(self, bee_id, max_depth=None, max_nodes=300, max_per_generation=30, seed=0):
+        """
+        Bounded ancestry for drawing: breadth-first like ancestry(), but
+        keeping at most max_per_generation bees per generation and max_nodes
+        in total. Parents are queued in a seeded random order, so a capped
+        generation is a sample of it, and only kept bees are expanded, so the
+        graph stays connected to the bee.
+        Returns (nodes, edges): (id, generation) pairs and (parent_id, child_id)
+        pairs between kept bees.
+        """
+        if not self.ids:
+            return [], []
+        ids = np.concatenate(self.ids)
+        parents = np.concatenate(self.parents)
+        generations = np.concatenate(self.generations)
+        rng = random.Random(seed)
+        per_generation = {}
+        nodes = []
+        links = []
+        seen = {bee_id}
+        queue = deque([(bee_id, 0)])
+        while queue and len(nodes) < max_nodes:
+            current, depth = queue.popleft()
+            row = np.searchsorted(ids, current)
+            if row >= len(ids) or ids[row] != current:
+                continue
+            generation = int(generations[row])
+            if per_generation.get(generation, 0) >= max_per_generation:
+                continue
+            per_generation[generation] = per_generation.get(generation, 0) + 1
+            nodes.append((int(current), generation))
+            if max_depth is not None and depth >= max_depth:
+                continue
+            parent_ids = [int(pid) for pid in parents[row] if pid >= 0]
+            rng.shuffle(parent_ids)
+            for pid in parent_ids:
+                links.append((pid, int(current)))
+                if pid not in seen:
+                    seen.add(pid)
+                    queue.append((pid, depth + 1))
+        kept = {node for node, _ in nodes}
+        return nodes, [(parent, child) for parent, child in links if parent in kept]
+
+    def __len__(self):
+        return sum(len(chunk) for chunk in self.ids)
+
+    def nbytes(self):
+        return sum(a.nbytes + p.nbytes + g.nbytes for a, p, g in zip(self.ids, self.parents, self.generations))
@@ -0,0 +1,132 @@
+import cProfile
+import os
+import time
+import tracemalloc
+from beehive import diversity
+
+PHASES = ("evaluate", "local_search", "sort", "print", "live", "stop", "selection", "reproduce",
+          "genealogy", "checkpoint")
+DEFAULT_PROFILE_DIR = os.path.join("data", "profiles")
+
+
+class Hooks:
+    """
+    Callbacks of run_simulation, all no-ops: subclass and override what you
+    need. Without hooks run_simulation does not call anything at all.
+    """
+
+    def on_run_start(self, run_id, mutation_rate):
+        pass
+
+    def on_generation_start(self, generation):
+        pass
+
+    def on_phase(self, name):
+        """Phase `name` of the current generation just ended."""
+        pass
+
+    def on_evaluate(self, generation, population, evaluated, cache):
+        """
+        population was just scored, evaluated of its bees by an actual
+        distance computation (cache: the FitnessCache or None).
+        """
+        pass
+
+    def on_generation_end(self, generation, population, best, average):
+        """population is the next generation (unchanged when the run stops here)."""
+        pass
+
+    def on_run_end(self, run_id, meta):
+        """Last call before the run is stored: entries added to meta are stored with it."""
+        pass
+
+    def on_run_stored(self, run_id, location):
+        pass
+
+
+class PhaseTimer(Hooks):
+    def __init__(self, diversity=True, profile=None, profile_dir=DEFAULT_PROFILE_DIR):
+        """
+        Timer collector: perf_counter time of every phase of every generation,
+        bees evaluated, cache hits and population diversity (share of
+        distinct paths, skipped with diversity=False). Everything goes to
+        meta["profile"] and so into the results store.
+        profile="cprofile" also dumps a cProfile of the run to
+        profile_dir/<run_id>.prof, profile="tracemalloc" records its peak
+        traced memory.
+        """
+        if profile not in (None, "cprofile", "tracemalloc"):
+            raise ValueError(f"Unknown profile mode: {profile}")
+        self.diversity = diversity
+        self.profile = profile
+        self.profile_dir = profile_dir
+        self.generations = []
+        self.phases = {name: [] for name in PHASES}
+        self.evaluations = []
+        self.cache_hits = []
+        self.diversities = []
+        self._last = None
+        self._hits = 0
+        self._started = None
+        self._profiler = None
+        self.storage_time = None  # time spent writing the run, known only once stored
+
+    def on_run_start(self, run_id, mutation_rate):
+        self._started = time.perf_counter()
+        if self.profile == "cprofile":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self.profile == "tracemalloc":
+            tracemalloc.start()
+
+    def on_generation_start(self, generation):
+        self.generations.append(generation)
+        for times in self.phases.values():
+            times.append(0.0)
+        self._last = time.perf_counter()
+
+    def on_phase(self, name):
+        now = time.perf_counter()
+        self.phases[name][-1] += now - self._last
+        self._last = now
+
+    def on_evaluate(self, generation, population, evaluated, cache):
+        self.evaluations.append(evaluated)
+        hits = cache.hits if cache is not None else 0
+        self.cache_hits.append(hits - self._hits)
+        self._hits = hits
+        if self.diversity:
+            self.diversities.append(diversity(population))
+        self._last = time.perf_counter()  # diversity is not part of any phase
+
+    def on_run_end(self, run_id, meta):
+        profile = {
+            "total_time": time.perf_counter() - self._started,
+            "phase_totals": {name: sum(times) for name, times in self.phases.items()},
+            "generations": self.generations,
+            "phases": self.phases,
+            "evaluations": self.evaluations,
+            "cache_hits": self.cache_hits,
+        }
+        if self.diversity:
+            profile["diversity"] = self.diversities
+        if self._profiler is not None:
+            self._profiler.disable()
+            os.makedirs(self.profile_dir, exist_ok=True)
+            profile["cprofile"] = os.path.join(self.profile_dir, f"{run_id}.prof")
+            self._profiler.dump_stats(profile["cprofile"])
+        elif self.profile == "tracemalloc":
+            profile["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        meta["profile"] = profile
+        self._last = time.perf_counter()
+
+    def on_run_stored(self, run_id, location):
+        self.storage_time = time.perf_counter() - self._last
+
+    def report(self):
+        """Per-phase share of the timed generation time, slowest first."""
+        totals = {name: sum(times) for name, times in self.phases.items()}
+        timed = sum(totals.values()) or 1.0
+        return [(name, seconds, seconds / timed)
+                for name, seconds in sorted(totals.items(), key=lambda item: -item[1]) if seconds]
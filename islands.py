@@ -0,0 +1,166 @@
+import os
+import multiprocessing as mp
+import queue
+import traceback
+import numpy as np
+import beehive
+from beehive import (Bee, FitnessCache, evaluate_population, generate_population, path_dtype, reproduce,
+                     selection)
+from fields import make_problem
+from storage import CsvSink, new_run_id, rate_folder_name
+
+RESULT_TIMEOUT = 1.0  # seconds between two liveness checks of the islands
+
+
+def topology_targets(n_islands, topology="ring"):
+    """Islands each island sends its migrants to."""
+    if topology == "ring":
+        return [[(i + 1) % n_islands] for i in range(n_islands)] if n_islands > 1 else [[]]
+    if topology in ("full", "fully_connected"):
+        return [[j for j in range(n_islands) if j != i] for i in range(n_islands)]
+    raise ValueError(f"Unknown island topology: {topology}")
+
+
+def _island(index, seed, config, targets, inboxes, results):
+    """
+    Process entry point of one island: puts (index, None, outcome) on
+    results, or (index, traceback, None) when the island failed.
+    """
+    try:
+        outcome = _evolve_island(index, seed, config, targets, inboxes)
+    except BaseException:
+        results.put((index, traceback.format_exc(), None))
+        raise
+    results.put((index, None, outcome))
+
+
+def _evolve_island(index, seed, config, targets, inboxes):
+    """
+    One island: the run_simulation loop (evaluation, elitist selection,
+    OX + swap mutation) on its own population, with migrations.
+    """
+    flowers, hive, pop_size, n_generations, mutation_rate, interval, n_migrants = config
+    rng, _ = beehive.run_rngs(seed)
+    beehive.BEE_COUNTER = index * 10**12  # ids stay unique across islands
+    problem = make_problem(flowers, hive)
+    cache = FitnessCache()
+    dtype = path_dtype(len(flowers))
+    sources = sum(index in t for t in targets)
+    pending = {}  # generation -> migrant arrays received early
+
+    population = generate_population(pop_size, flowers, rng)
+    history_distance = []
+    history_best = []
+    history_avg = []
+    for gen in range(n_generations):
+        evaluate_population(population, flowers, hive, problem, cache)
+        population.sort(key=lambda b: b.fitness, reverse=True)
+        history_distance.append(population[0].distance)
+        history_best.append(population[0].fitness)
+        history_avg.append(sum(b.fitness for b in population) / len(population))
+
+        # Migration: elites leave as a compact path array, migrants replace the worst bees
+        if interval and gen and gen % interval == 0 and sources:
+            migrants = np.array([b.path for b in population[:n_migrants]], dtype=dtype)
+            for target in targets[index]:
+                inboxes[target].put((gen, index, migrants.tobytes()))
+            received = pending.pop(gen, [])
+            while len(received) < sources:
+                message_gen, source, payload = inboxes[index].get()
+                if message_gen == gen:
+                    received.append((source, payload))
+                else:
+                    pending.setdefault(message_gen, []).append((source, payload))
+            incoming = [np.frombuffer(payload, dtype=dtype).reshape(-1, len(flowers))
+                        for _, payload in sorted(received)]
+            newcomers = [Bee(path.tolist(), generation=population[0].generation)
+                         for path in np.concatenate(incoming)][:pop_size - 1]
+            if newcomers:
+                population[-len(newcomers):] = newcomers
+                evaluate_population(newcomers, flowers, hive, problem, cache)
+                population.sort(key=lambda b: b.fitness, reverse=True)
+
+        selected = selection(population, proportion=0.5)
+        population = selected + reproduce(selected, pop_size - len(selected), mutation_rate, rng=rng)
+
+    evaluate_population(population, flowers, hive, problem, cache)
+    best = max(population, key=lambda b: b.fitness)
+    return index, history_distance, history_best, history_avg, best.path, best.distance
+
+
+def _collect_islands(processes, results):
+    """
+    Outcomes of every island, in island order. Raises RuntimeError as soon
+    as an island reports an error or dies without a result; the other
+    islands are then terminated.
+    """
+    outcomes = {}
+    try:
+        while len(outcomes) < len(processes):
+            try:
+                index, error, outcome = results.get(timeout=RESULT_TIMEOUT)
+            except queue.Empty:
+                for index, process in enumerate(processes):
+                    if index not in outcomes and process.exitcode not in (None, 0):
+                        raise RuntimeError(f"Island {index} exited with code {process.exitcode}")
+                continue
+            if error is not None:
+                raise RuntimeError(f"Island {index} failed:\n{error}")
+            outcomes[index] = outcome
+    finally:
+        failed = len(outcomes) < len(processes)
+        for process in processes:
+            if failed and process.is_alive():
+                process.terminate()
+            process.join()
+    return [outcomes[index] for index in range(len(processes))]
+
+
+def run_islands(mutation_rate, flowers, hive, pop_size, n_generations, n_islands=None, topology="ring",
+                interval=10, n_migrants=2, seed=1234, run_id=None, sink=None):
+    """
+    Island-model GA: n_islands populations of pop_size bees, each evolved in
+    its own process with the usual operators. Every `interval` generations the
+    n_migrants best paths of each island are sent (as raw int arrays, not
+    pickled Bees) to its neighbours on the topology ("ring" or "full") and
+    replace their worst bees.
+    The per-generation best is the best over islands and the average is the
+    mean of the island averages; the run is written to the sink like a
+    run_simulation run.
+    Returns (best_bee, history_best, history_avg, folder, csv_filename).
+    """
+    n_islands = n_islands or os.cpu_count() or 1
+    if run_id is None:
+        run_id = new_run_id()
+    if sink is None:
+        sink = CsvSink()
+    folder = os.path.join(getattr(sink, "data_root", "data"), rate_folder_name(mutation_rate))
+
+    seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(n_islands)]
+    config = (flowers, hive, pop_size, n_generations, mutation_rate, interval, n_migrants)
+    targets = topology_targets(n_islands, topology)
+    inboxes = [mp.Queue() for _ in range(n_islands)]
+    results = mp.Queue()
+    processes = [mp.Process(target=_island, args=(i, seeds[i], config, targets, inboxes, results), daemon=True)
+                 for i in range(n_islands)]
+    for process in processes:
+        process.start()
+    outcomes = _collect_islands(processes, results)
+
+    rows = []
+    for gen in range(n_generations):
+        best = min(outcomes, key=lambda o: o[1][gen])
+        avg = sum(o[3][gen] for o in outcomes) / n_islands
+        rows.append((gen, best[1][gen], best[2][gen], avg))
+    history_best = [row[2] for row in rows]
+    history_avg = [row[3] for row in rows]
+    _, _, _, _, best_path, best_distance = min(outcomes, key=lambda o: o[5])
+
+    meta = {"n_generations": n_generations, "islands": n_islands, "topology": topology,
+            "interval": interval, "n_migrants": n_migrants}
+    csv_filename = sink.write_run(run_id, mutation_rate, rows, seed=seed, meta=meta)
+
+    best_bee = Bee(best_path)
+    best_bee.distance = best_distance
+    best_bee.fitness = 1 / best_distance
+    return best_bee, history_best, history_avg, folder, csv_filename
@@ -0,0 +1,112 @@
+import json
+import socket
+import threading
+import time
+from collections import deque
+
+DEFAULT_ADDRESS = ("127.0.0.1", 8765)
+MAX_DATAGRAM = 60000
+MAX_PATH_LENGTH = 1000  # longer best paths are not streamed
+
+
+class LivePublisher:
+    def __init__(self, target=DEFAULT_ADDRESS, interval=0.25):
+        """
+        Publish per-generation stats of a run, batched and throttled: events are
+        buffered and sent at most every `interval` seconds. target is a
+        (host, port) UDP address (fire-and-forget, never blocks the run) or a
+        LiveFeed in the same process.
+        """
+        self.target = target
+        self.interval = interval
+        self._buffer = []
+        self._last_sent = 0.0
+        self._socket = None
+        if not isinstance(target, LiveFeed):
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._socket.setblocking(False)
+
+    def publish(self, event):
+        if event.get("best_path") is not None and len(event["best_path"]) > MAX_PATH_LENGTH:
+            event = dict(event, best_path=None)
+        self._buffer.append(event)
+        now = time.perf_counter()
+        if now - self._last_sent >= self.interval:
+            self.flush()
+            self._last_sent = now
+
+    def flush(self):
+        events, self._buffer = self._buffer, []
+        if not events:
+            return
+        if self._socket is None:
+            self.target.publish(events)
+            return
+        payload = json.dumps(events).encode("utf-8")
+        if len(payload) <= MAX_DATAGRAM:
+            self._send(payload)
+        else:
+            for event in events:
+                payload = json.dumps([event]).encode("utf-8")
+                if len(payload) <= MAX_DATAGRAM:
+                    self._send(payload)
+
+    def _send(self, payload):
+        try:
+            self._socket.sendto(payload, self.target)
+        except OSError:
+            pass  # nobody listening or buffer full: monitoring is best effort
+
+    def close(self):
+        self.flush()
+        if self._socket is not None:
+            self._socket.close()
+
+
+class LiveFeed:
+    def __init__(self, maxlen=5000):
+        """
+        Receiving side: keeps the most recent events (with a sequence number)
+        and wakes up the SSE streams waiting for new ones.
+        """
+        self.events = deque(maxlen=maxlen)
+        self.sequence = 0
+        self._condition = threading.Condition()
+        self._listener = None
+
+    def publish(self, events):
+        with self._condition:
+            for event in events:
+                self.sequence += 1
+                self.events.append((self.sequence, event))
+            self._condition.notify_all()
+
+    def since(self, sequence, timeout=15.0):
+        """Events newer than `sequence`, waiting up to `timeout` seconds for some."""
+        with self._condition:
+            if self.sequence <= sequence:
+                self._condition.wait(timeout)
+            return [(seq, event) for seq, event in self.events if seq > sequence]
+
+    def listen(self, address=DEFAULT_ADDRESS):
+        """Start (once) a background thread receiving publisher datagrams. Returns False if the port is taken."""
+        with self._condition:
+            if self._listener is not None:
+                return True
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            try:
+                sock.bind(address)
+            except OSError:
+                sock.close()
+                return False
+            self._listener = threading.Thread(target=self._receive, args=(sock,), name="live-feed", daemon=True)
+            self._listener.start()
+            return True
+
+    def _receive(self, sock):
+        while True:
+            payload, _ = sock.recvfrom(65535)
+            try:
+                self.publish(json.loads(payload))
+            except ValueError:
+                continue
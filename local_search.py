@@ -0,0 +1,159 @@
+import heapq
+import time
+
+
+class LocalSearch:
+    def __init__(self, problem, k=8, or_opt=True, target="elites", count=1, max_moves=None, time_budget=None):
+        """
+        Memetic step: 2-opt and Or-opt moves, delta-evaluated on the Problem
+        distances, restricted to the k nearest neighbours of each node and
+        driven by don't-look bits (one improvement pass is about O(n * k)).
+        target is "elites" (the count best bees) or "offspring" (every new bee).
+        max_moves / time_budget (seconds) bound the work of one apply() call.
+        """
+        if target not in ("elites", "offspring"):
+            raise ValueError(f"Unknown local search target: {target}")
+        self.problem = problem
+        self.neighbors = problem.neighbors(k)
+        self.or_opt = or_opt
+        self.target = target
+        self.count = count
+        self.max_moves = max_moves
+        self.time_budget = time_budget
+        self.moves = 0  # total improving moves applied
+
+    def targets(self, population, offspring):
+        """Bees the stage should improve this generation."""
+        if self.target == "offspring":
+            return offspring
+        return heapq.nsmallest(self.count, population, key=lambda b: b.distance)
+
+    def apply(self, bees):
+        """
+        Improve the paths of the given bees in place. Scored bees get their
+        distance updated from the move deltas, dirty bees stay dirty.
+        """
+        deadline = None if self.time_budget is None else time.perf_counter() + self.time_budget
+        budget = self.max_moves
+        for bee in bees:
+            path, delta, moves = self.improve(bee.path, budget, deadline)
+            if budget is not None:
+                budget -= moves
+            if delta < 0:
+                bee.path = path
+                if not bee.dirty:
+                    bee.distance += delta
+                    bee.fitness = 1 / bee.distance
+            if (budget is not None and budget <= 0) or (deadline is not None and time.perf_counter() > deadline):
+                break
+
+    def improve(self, path, max_moves=None, deadline=None):
+        """
+        Local search on one path. Returns (new_path, distance_delta, moves).
+        """
+        d = self.problem.pair_distance
+        neighbors = self.neighbors
+        tour = [0] + [gene + 1 for gene in path]  # matrix indices, hive = 0
+        m = len(tour)
+        if m < 4:
+            return list(path), 0.0, 0
+        pos = [0] * m
+        for i, node in enumerate(tour):
+            pos[node] = i
+
+        def reverse(i, j):
+            # Reverse the cyclic segment tour[i..j], going through the shorter side
+            length = (j - i) % m + 1
+            if 2 * length > m:
+                i, j = (j + 1) % m, (i - 1) % m
+                length = m - length
+            for _ in range(length // 2):
+                a, b = tour[i], tour[j]
+                tour[i], tour[j] = b, a
+                pos[b], pos[a] = i, j
+                i = (i + 1) % m
+                j = (j - 1) % m
+
+        def two_opt(a):
+            i = pos[a]
+            for succ_side in (True, False):
+                b = tour[(i + 1) % m] if succ_side else tour[(i - 1) % m]
+                d_ab = d(a, b)
+                for c in neighbors[a]:
+                    d_ac = d(a, c)
+                    if d_ac >= d_ab:
+                        break
+                    j = pos[c]
+                    e = tour[(j + 1) % m] if succ_side else tour[(j - 1) % m]
+                    if e == a or c == b:
+                        continue
+                    delta = d_ac + d(b, e) - d_ab - d(c, e)
+                    if delta < -1e-10:
+                        if succ_side:
+                            reverse((i + 1) % m, j)
+                        else:
+                            reverse(i, (j - 1) % m)
+                        return delta, (a, b, c, e)
+            return 0.0, ()
+
+        def or_opt(a):
+            nonlocal tour
+            for length in (1, 2, 3):
+                i = pos[a]
+                seg = [tour[(i + s) % m] for s in range(length)]
+                if 0 in seg or length + 2 >= m:
+                    continue  # the hive stays put
+                first, last = seg[0], seg[-1]
+                prev, nxt = tour[(i - 1) % m], tour[(i + length) % m]
+                removal = d(prev, first) + d(last, nxt) - d(prev, nxt)
+                for end in (first, last):
+                    for c in neighbors[end]:
+                        if c in seg:
+                            continue
+                        j = pos[c]
+                        for e in (tour[(j + 1) % m], tour[(j - 1) % m]):
+                            if e in seg:
+                                continue
+                            # Insert seg between c and e, end next to c
+                            other = last if end == first else first
+                            delta = d(c, end) + d(other, e) - d(c, e) - removal
+                            if delta < -1e-10:
+                                rest = [node for node in tour if node not in seg]
+                                k = rest.index(c)
+                                ordered = seg if end == first else seg[::-1]
+                                if rest[(k + 1) % len(rest)] == e:
+                                    rest[k + 1:k + 1] = ordered
+                                else:
+                                    rest[k:k] = ordered[::-1]
+                                tour = rest
+                                for idx, node in enumerate(tour):
+                                    pos[node] = idx
+                                return delta, (prev, nxt, c, e, first, last)
+            return 0.0, ()
+
+        total = 0.0
+        moves = 0
+        queue = list(range(m))  # don't-look bits: only queued nodes are examined
+        active = [True] * m
+        while queue:
+            if max_moves is not None and moves >= max_moves:
+                break
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+            a = queue.pop()
+            active[a] = False
+            delta, touched = two_opt(a)
+            if not delta and self.or_opt:
+                delta, touched = or_opt(a)
+            if delta:
+                total += delta
+                moves += 1
+                for node in (a,) + touched:
+                    if not active[node]:
+                        active[node] = True
+                        queue.append(node)
+
+        self.moves += moves
+        start = pos[0]
+        rotated = tour[start:] + tour[:start]
+        return [node - 1 for node in rotated[1:]], total, moves
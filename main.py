@@ -1,106 +1,67 @@
-import matplotlib.pyplot as plt
+import argparse
 import random
-import networkx as nx
-import csv
-import datetime
 import os
+import sys
+import rendering
 from beehive import *
-random.seed(1234) 
+from simulation import run_simulation
+from storage import CsvSink, SqliteSink, DEFAULT_STORE, rate_folder_name
 
+# Plotting (matplotlib, networkx) and sweep modules are imported where they are
+# used, so compute-only commands and sweep workers never load them.
 
-def run_simulation(mutation_rate, flowers, hive, pop_size, n_generations, genealogy=False):
-    """
-    Run one simulation with a given mutation rate.
-    Save CSV results and return stats.
-    If genealogy=True → returns (best_bee, history_best, history_avg, all_bees, csv_filename).
-    Otherwise → returns (history_best, history_avg, csv_filename).
-    """
+# Fixed set of 20 flowers
+DEFAULT_HIVE = (500, 500)
+DEFAULT_FLOWERS = [(796, 310), (774, 130), (116, 69), (908, 534), (708, 99), (444, 428),
+                   (220, 307), (501, 287), (345, 560), (628, 311), (901, 639), (436, 619),
+                   (938, 646), (45, 549), (837, 787), (328, 489), (278, 434), (704, 995),
+                   (101, 482), (921, 964)]
 
-    # --- Create folder for this mutation rate ---
-    folder = f"data/mutation_rate_{mutation_rate}"
-    os.makedirs(folder, exist_ok=True)
+POP_SIZE = 101
+N_GENERATIONS = 200
+MUTATION_RATES = [0.01, 0.05, 0.1, 0.5, 0.8, 1.0]
+GENEALOGY_DEPTH = 6  # generations of ancestors drawn in the genealogy tree
 
-    # --- Create CSV filename ---
-    timestamp = datetime.datetime.now().strftime("%d%m%Y_%H%M%S")
-    csv_filename = os.path.join(folder, f"results_{timestamp}.csv")
 
-    population = generate_population(pop_size, flowers)
-    history_best = []
-    history_avg = []
-    all_bees = list(population)
+def plot_genealogy(genealogy, best_bee, folder, depth=GENEALOGY_DEPTH, show=True, queue=None):
+    nodes, edges = genealogy.sample_ancestry(best_bee.id, max_depth=depth)
+    data = {"nodes": nodes, "edges": edges, "root": best_bee.id}
+    rendering.plot("genealogy", data, folder, "genealogy_tree", queue, show)
 
-    # --- Open CSV file ---
-    with open(csv_filename, mode="w", newline="", encoding="utf-8") as csv_file:
-        writer = csv.writer(csv_file, delimiter=";")
-        writer.writerow(["Generation", "Best Distance", "Best Fitness", "Average Fitness"])
 
-        for gen in range(n_generations):
-            # Evaluate
-            for bee in population:
-                bee.evaluate(flowers, hive)
+def plot_best_path(best_bee, flowers, hive, folder, show=True, queue=None):
+    data = {"hive": list(hive), "flowers": [list(f) for f in flowers], "path": list(best_bee.path)}
+    rendering.plot("best_path", data, folder, "best_path", queue, show)
 
-            # Sort by fitness
-            population.sort(key=lambda b: b.fitness, reverse=True)
 
-            best = population[0]
-            avg = sum(b.fitness for b in population) / len(population)
-            history_best.append(best.fitness)
-            history_avg.append(avg)
+def plot_fitness(history_best, history_avg, rate, folder, show=True, queue=None):
+    data = {"best": list(history_best), "avg": list(history_avg), "rate": rate}
+    rendering.plot("fitness", data, folder, "fitness_evolution", queue, show)
 
-            print(f"[Mutation={mutation_rate}] Gen {gen} | Best distance: {best.distance:.2f}")
 
-            writer.writerow([gen, best.distance, best.fitness, avg])
+def plot_rate_comparison(results, title, ylabel, name, folder="data/comparison", show=True, queue=None):
+    data = {"series": [(rate, list(values)) for rate, values in results.items()], "title": title, "ylabel": ylabel}
+    rendering.plot("rate_comparison", data, folder, name, queue, show)
 
-            # Selection
-            selected = selection(population, proportion=0.5)
 
-            # Reproduction + mutation
-            offspring = []
-            while len(selected) + len(offspring) < pop_size:
-                parent1, parent2 = random.sample(selected, 2)
-                child = crossover(parent1, parent2)
-                child = mutation(child, mutation_rate)
-                child.evaluate(flowers, hive)
-                offspring.append(child)
-
-            all_bees.extend(offspring)
-            population = selected + offspring
-
-    if genealogy:
-        return population[0], history_best, history_avg, all_bees, folder, csv_filename
-    else:
-        return history_best, history_avg, folder, csv_filename
-
-
-def save_plot(fig, folder, name):
-    """Helper to save and close matplotlib figures as PNG"""
-    timestamp = datetime.datetime.now().strftime("%d%m%Y_%H%M%S")
-    filepath = os.path.join(folder, f"{name}_{timestamp}.png")
-    fig.savefig(filepath, dpi=300, bbox_inches="tight")
-    print(f"[Saved plot] {filepath}")
-    plt.close(fig)
-
-
-def main():
-    hive = (500, 500)
-
-    # Fixed set of 20 flowers
-    flowers = [(796, 310), (774, 130), (116, 69), (908, 534), (708, 99), (444, 428),
-               (220, 307), (501, 287), (345, 560), (628, 311), (901, 639), (436, 619),
-               (938, 646), (45, 549), (837, 787), (328, 489), (278, 434), (704, 995),
-               (101, 482), (921, 964)]
-
-    POP_SIZE = 101
-    N_GENERATIONS = 200
-    MUTATION_RATES = [0.01, 0.05, 0.1, 0.5, 0.8, 1.0]
+def interactive():
+    """The original prompt-driven session (python main.py without arguments)."""
+    random.seed(1234)
+    flowers, hive = DEFAULT_FLOWERS, DEFAULT_HIVE
+    queue = rendering.RenderQueue()  # figures are saved in the background while the session goes on
 
     try:
         mass_testing = input("\nDo you want to test for 1k of each mutation rates (y/n) : ")
         if mass_testing in ("y","n"):
             if mass_testing == "y":
-                for _ in range(1000):
-                    for rate in MUTATION_RATES:
-                        best_bee, history_best,history_avg,all_bees,folder,csv_filename = run_simulation(rate,flowers,hive,POP_SIZE,N_GENERATIONS,genealogy=True)
+                from checkpoint import DEFAULT_CHECKPOINT_DIR, ledger_path
+                from runner import run_sweep, sweep_config
+                with SqliteSink(DEFAULT_STORE) as sink:
+                    config = sweep_config(flowers, hive, POP_SIZE, N_GENERATIONS, 1234, sink)
+                    run_sweep(MUTATION_RATES, 1000, flowers, hive, POP_SIZE, N_GENERATIONS,
+                              workers=os.cpu_count(), master_seed=1234, sink=sink,
+                              ledger=ledger_path(config), checkpoint_dir=DEFAULT_CHECKPOINT_DIR)
+                print(f"\nResults saved in: {DEFAULT_STORE}")
             elif mass_testing == "n":
                 try:
                     taux_mutation = float(input("\nEnter mutation rate (ex : 0.05 for 5%) : "))
@@ -114,7 +75,7 @@ def main():
                 # -----------------------------
                 # Main simulation (with genealogy)
                 # -----------------------------
-                best_bee, history_best, history_avg, all_bees, folder, csv_filename = run_simulation(
+                best_bee, history_best, history_avg, genealogy, folder, csv_filename = run_simulation(
                     MAIN_MUTATION, flowers, hive, POP_SIZE, N_GENERATIONS, genealogy=True
                 )
 
@@ -122,64 +83,10 @@ def main():
                 print(f"Best distance found: {best_bee.distance:.2f}")
                 print(f"Results saved in: {csv_filename}\n")
 
-                # -----------------------------
-                # Graph 1: Genealogy Tree
-                # -----------------------------
-                G = nx.DiGraph()
-                bee_dict = {bee.id: bee for bee in all_bees}
-
-                def add_genealogy(bee):
-                    if bee.id not in G:
-                        G.add_node(bee.id, label=f"Bee {bee.id} (Gen {bee.generation})")
-                        for pid in bee.parents:
-                            G.add_edge(pid, bee.id)
-                            if pid in bee_dict:
-                                add_genealogy(bee_dict[pid])
-
-                add_genealogy(best_bee)
-
-                pos = nx.spring_layout(G)
-                labels = nx.get_node_attributes(G, 'label')
-
-                fig1 = plt.figure(figsize=(10, 6))
-                nx.draw(G, pos, with_labels=True, labels=labels,
-                        node_size=600, node_color="lightblue", font_size=8)
-                plt.title("Genealogy of the Best Bee")
-                plt.show()
-                save_plot(fig1, folder, "genealogy_tree")
-
-                # -----------------------------
-                # Graph 2: Best Path
-                # -----------------------------
-                x = [hive[0]] + [flowers[i][0] for i in best_bee.path] + [hive[0]]
-                y = [hive[1]] + [flowers[i][1] for i in best_bee.path] + [hive[1]]
-
-                fig2 = plt.figure(figsize=(10, 6))
-                plt.scatter(*hive, color="red", s=120, marker="s", label="Hive")
-                plt.scatter([f[0] for f in flowers], [f[1] for f in flowers],
-                            color="gold", s=100, marker="o", edgecolors="black", label="Flowers")
-                plt.plot(x, y, color="blue", linewidth=2, linestyle="-", label="Best Path")
-                plt.scatter(x, y, color="blue", s=40)
-                plt.title("Path of the Best Bee")
-                plt.legend()
-                plt.grid(True, linestyle="--", alpha=0.5)
-                plt.show()
-                save_plot(fig2, folder, "best_path")
-                
-
-                # -----------------------------
-                # Graph 3: Fitness Evolution
-                # -----------------------------
-                fig3 = plt.figure(figsize=(10, 6))
-                plt.plot(history_best, label="Best Fitness", color="blue")
-                plt.plot(history_avg, label="Average Fitness", color="orange")
-                plt.title(f"Performance Evolution Across Generations (Mutation {MAIN_MUTATION})")
-                plt.xlabel("Generations")
-                plt.ylabel("Fitness")
-                plt.legend()
-                plt.show()
-                save_plot(fig3, folder, "fitness_evolution")
-            
+                # Graph 1: Genealogy Tree, Graph 2: Best Path, Graph 3: Fitness Evolution
+                plot_genealogy(genealogy, best_bee, folder, queue=queue)
+                plot_best_path(best_bee, flowers, hive, folder, queue=queue)
+                plot_fitness(history_best, history_avg, MAIN_MUTATION, folder, queue=queue)
 
                 # -----------------------------
                 # Ask for mutation comparison
@@ -197,32 +104,171 @@ def main():
                         results_avg[rate] = avg
                         print(f"Saved results for mutation {rate} in {csv_file}")
 
-                    # Best Fitness comparison
-                    fig4 = plt.figure(figsize=(10, 6))
-                    for rate, values in results_best.items():
-                        plt.plot(values, label=f"Mutation {rate}")
-                    plt.title("Best Fitness Comparison by Mutation Rate")
-                    plt.xlabel("Generations")
-                    plt.ylabel("Best Fitness")
-                    plt.legend()
-                    plt.show()
-                    save_plot(fig4, "data/comparison", "comparison_best_fitness")
-
-                    # Average Fitness comparison
-                    fig5 = plt.figure(figsize=(10, 6))
-                    for rate, values in results_avg.items():
-                        plt.plot(values, label=f"Mutation {rate}")
-                    plt.title("Average Fitness Comparison by Mutation Rate")
-                    plt.xlabel("Generations")
-                    plt.ylabel("Average Fitness")
-                    plt.legend()
-                    plt.show()
-                    save_plot(fig5, "data/comparison", "comparison_avg_fitness")
+                    plot_rate_comparison(results_best, "Best Fitness Comparison by Mutation Rate",
+                                         "Best Fitness", "comparison_best_fitness", queue=queue)
+                    plot_rate_comparison(results_avg, "Average Fitness Comparison by Mutation Rate",
+                                         "Average Fitness", "comparison_avg_fitness", queue=queue)
 
 
     except ValueError:
         print('Please enter "y" or "n"')
-        
+    finally:
+        queue.close()
+
+
+# --- Headless command line ---
+
+def load_flowers(args):
+    """Field of the command: --field file, --random-field N, or the default 20 flowers."""
+    if args.field:
+        from fields import load_field
+        return load_field(args.field)
+    if args.random_field:
+        from fields import random_field
+        return random_field(args.random_field, seed=args.seed)
+    return DEFAULT_FLOWERS, DEFAULT_HIVE
+
+
+def cmd_run(args):
+    from fields import make_problem
+    flowers, hive = load_flowers(args)
+    sink = CsvSink(args.output)
+    hooks = None
+    if args.profile:
+        from instrumentation import PhaseTimer
+        hooks = PhaseTimer(profile=None if args.profile == "timers" else args.profile)
+    result = run_simulation(args.rate, flowers, hive, args.pop, args.generations,
+                            genealogy=args.plot, problem=make_problem(flowers, hive), verbose=args.verbose,
+                            sink=sink, seed=args.seed, cache=FitnessCache(), hooks=hooks)
+    if args.plot:
+        best_bee, history_best, history_avg, genealogy, _, location = result
+    else:
+        history_best, history_avg, _, location = result
+    print(f"Best distance found: {1 / history_best[-1]:.2f}")
+    print(f"Results saved in: {location}")
+    if hooks is not None:
+        for name, seconds, share in hooks.report():
+            print(f"  {name:14s} {seconds:9.4f} s {share:7.1%}")
+    if args.plot:
+        folder = os.path.join(args.output, rate_folder_name(args.rate))
+        with rendering.RenderQueue(workers=3) as queue:
+            plot_genealogy(genealogy, best_bee, folder, show=False, queue=queue)
+            plot_best_path(best_bee, flowers, hive, folder, show=False, queue=queue)
+            plot_fitness(history_best, history_avg, args.rate, folder, show=False, queue=queue)
+
+
+def cmd_sweep(args):
+    if args.engine == "batch":
+        unsupported = [flag for flag, value in (("--workers", args.workers), ("--profile", args.profile),
+                                                ("--no-resume", args.no_resume or None)) if value is not None]
+        if unsupported:
+            args.parser.error(f"{', '.join(unsupported)} not supported with --engine batch")
+    flowers, hive = load_flowers(args)
+    seed = 1234 if args.seed is None else args.seed
+    sink = CsvSink(args.output) if args.csv else SqliteSink(args.store)
+    try:
+        if args.engine == "batch":
+            from batch import run_batch
+            run_batch(args.rates, args.repetitions, flowers, hive, args.pop, args.generations,
+                      seed=seed, sink=sink)
+        else:
+            from checkpoint import DEFAULT_CHECKPOINT_DIR, ledger_path
+            from runner import run_sweep, sweep_config
+            hooks = None
+            if args.profile:
+                from instrumentation import PhaseTimer
+                hooks = PhaseTimer
+            run_sweep(args.rates, args.repetitions, flowers, hive, args.pop, args.generations,
+                      workers=args.workers, master_seed=seed, sink=sink,
+                      ledger=None if args.no_resume else ledger_path(
+                          sweep_config(flowers, hive, args.pop, args.generations, seed, sink)),
+                      checkpoint_dir=None if args.no_resume else DEFAULT_CHECKPOINT_DIR, hooks=hooks)
+    finally:
+        sink.close()
+    print(f"\nResults saved in: {args.output if args.csv else args.store}")
+
+
+def cmd_aggregate(args):
+    import mean_comparision
+    mean_comparision.main(args.data, args.output, plot=args.plot, show=False)
+
+
+def cmd_plot(args):
+    if args.run:
+        import pandas as pd
+        df = pd.read_csv(args.run, sep=';')
+        folder = args.output or os.path.dirname(args.run)
+        plot_fitness(df["Best Fitness"].tolist(), df["Average Fitness"].tolist(),
+                     os.path.basename(os.path.dirname(args.run)), folder, show=False)
+        return
+    from pathlib import Path
+    import pandas as pd
+    import mean_comparision
+    means = Path(args.means)
+    results = {path.name[:-len("_mean.csv")]: pd.read_csv(path) for path in sorted(means.glob("*_mean.csv"))}
+    if not results:
+        print(f"No aggregated results in {means}/, run the aggregate command first.")
+        return
+    mean_comparision.create_comparison_plots(results, Path(args.output or means), show=False)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Bees and honey: genetic algorithm on a flower field.")
+    commands = parser.add_subparsers(dest="command")
+
+    field = argparse.ArgumentParser(add_help=False)
+    field.add_argument("--field", help="TSPLIB (.tsp) or x;y CSV file, first point is the hive")
+    field.add_argument("--random-field", type=int, metavar="N", help="random field of N flowers (seeded by --seed)")
+    field.add_argument("--pop", type=int, default=POP_SIZE, help="population size")
+    field.add_argument("--generations", type=int, default=N_GENERATIONS)
+    field.add_argument("--seed", type=int, help="run seed (sweep: master seed, default 1234)")
+    field.add_argument("--output", default="data", help="results folder (CSV runs and plots)")
+    field.add_argument("--profile", nargs="?", const="timers", choices=["timers", "cprofile", "tracemalloc"],
+                       help="per-phase timings, optionally with cProfile or tracemalloc")
+
+    run = commands.add_parser("run", parents=[field], help="one simulation")
+    run.add_argument("--rate", type=float, default=0.05, help="mutation rate")
+    run.add_argument("-v", "--verbose", action="store_true", help="print every generation")
+    run.add_argument("--plot", action="store_true", help="save genealogy, path and fitness plots")
+    run.set_defaults(func=cmd_run)
+
+    sweep = commands.add_parser("sweep", parents=[field], help="repetitions of several mutation rates")
+    sweep.add_argument("--rates", type=float, nargs="+", default=MUTATION_RATES)
+    sweep.add_argument("--repetitions", type=int, default=1000)
+    sweep.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    sweep.add_argument("--engine", choices=["process", "batch"], default="process",
+                       help="process pool of run_simulation calls, or the batched tensor engine")
+    sweep.add_argument("--store", default=DEFAULT_STORE, help="SQLite results store")
+    sweep.add_argument("--csv", action="store_true", help="one CSV per run in --output instead of the store")
+    sweep.add_argument("--no-resume", action="store_true", help="no ledger / checkpoints")
+    sweep.set_defaults(func=cmd_sweep, parser=sweep)
+
+    aggregate = commands.add_parser("aggregate", help="per-generation means of every mutation rate")
+    aggregate.add_argument("--data", default="data")
+    aggregate.add_argument("--output", default="output_means")
+    aggregate.add_argument("--plot", action="store_true", help="also save the comparison plot")
+    aggregate.set_defaults(func=cmd_aggregate)
+
+    plot = commands.add_parser("plot", help="plots from stored results")
+    plot.add_argument("--run", help="fitness evolution of one CSV run")
+    plot.add_argument("--means", default="output_means", help="aggregated means for the comparison plot")
+    plot.add_argument("--output", help="folder of the PNG (default: next to the inputs)")
+    plot.set_defaults(func=cmd_plot)
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        interactive()
+        return
+    args = build_parser().parse_args(argv)
+    if getattr(args, "func", None) is None:
+        build_parser().print_help()
+        return
+    os.environ.setdefault("MPLBACKEND", "Agg")  # headless: figures are saved, never shown
+    args.func(args)
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,126 +1,369 @@
 import os
+import json
 import pandas as pd
 import numpy as np
 from pathlib import Path
-import matplotlib.pyplot as plt
+import rendering
+from storage import (DEFAULT_STORE, RUNS_INDEX, _read_index, generation_sums, last_rowid, last_rows, list_rates,
+                     list_runs, rate_folder_name)
 
-# Optional: Use scienceplots for better visuals (pip install scienceplots)
-try:
-    import seaborn as sns
-    import scienceplots
-    plt.style.use(["science", "grid", "high-vis", "no-latex"])
-    sns.set_context("paper", font_scale=1.15)
-except ImportError:
-    print("scienceplots/seaborn not found, using default matplotlib style.")
 
-def process_mutation_rate_directory(rate_dir_path, output_dir):
+def comparison_style():
     """
-    Process all CSV files in a mutation rate directory and calculate mean and std by generation.
+    Matplotlib style of the comparison figure, entered by the renderer before
+    the figure is created (see rendering.STYLES).
     """
-    rate_name = rate_dir_path.name
-    csv_files = list(rate_dir_path.glob("*.csv"))
-    if not csv_files:
-        print(f"No CSV files found in {rate_name}")
+    # Optional: Use scienceplots for better visuals (pip install scienceplots)
+    try:
+        import seaborn as sns
+        import scienceplots
+        return ["science", "grid", "high-vis", "no-latex", dict(sns.plotting_context("paper", font_scale=1.15))]
+    except ImportError:
+        print("scienceplots/seaborn not found, using default matplotlib style.")
+        return []
+
+METRICS = ['best_distance', 'best_fitness', 'average_fitness']
+MANIFEST_NAME = '.aggregate_manifest.json'
+MANIFEST_VERSION = 4
+
+
+def summarize(df):
+    """
+    Per-generation count, padded count (see pad_run), mean and M2 (sum of
+    squared deviations) of every metric.
+    """
+    grouped = df.groupby('generation')[METRICS]
+    summary = grouped.mean().add_suffix('_mean')
+    m2 = grouped.var(ddof=0).mul(grouped.count(), axis=0).add_suffix('_m2')
+    summary = summary.join(m2)
+    summary.insert(0, 'count', grouped.size())
+    padded = df.groupby('generation')['padded'].sum().astype(int) if 'padded' in df else 0
+    summary.insert(1, 'padded', padded)
+    return summary
+
+
+def summary_from_sums(rows, padded=False):
+    """
+    Summary built from (generation, count, sum, sumsq, ...) rows of the results
+    store, or of padding_rows with padded=True.
+    """
+    records = []
+    for generation, count, *sums in rows:
+        record = {'generation': generation, 'count': count, 'padded': count if padded else 0}
+        for i, metric in enumerate(METRICS):
+            total, total_sq = sums[2 * i], sums[2 * i + 1]
+            record[f'{metric}_mean'] = total / count
+            record[f'{metric}_m2'] = max(total_sq - total * total / count, 0.0)
+        records.append(record)
+    return pd.DataFrame.from_records(records).set_index('generation')
+
+
+def merge_summaries(a, b):
+    """Combine two per-generation summaries (Chan et al. parallel variance)."""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    a, b = a.align(b, join='outer', fill_value=0)
+    count = a['count'] + b['count']
+    merged = pd.DataFrame({'count': count, 'padded': a['padded'] + b['padded']})
+    for metric in METRICS:
+        delta = b[f'{metric}_mean'] - a[f'{metric}_mean']
+        mean = a[f'{metric}_mean'] + delta * b['count'] / count
+        m2 = a[f'{metric}_m2'] + b[f'{metric}_m2'] + delta ** 2 * a['count'] * b['count'] / count
+        merged[f'{metric}_mean'] = mean
+        merged[f'{metric}_m2'] = m2
+    return merged
+
+
+def finalize(summary):
+    """
+    Mean and sample std by generation, in the output_means/*_mean.csv layout,
+    plus padded_runs: how many of the runs averaged at that generation had
+    already stopped and were padded with their last generation (pad_run).
+    """
+    result_df = pd.DataFrame({'generation': summary.index.astype(int)})
+    for metric in METRICS:
+        result_df[metric] = summary[f'{metric}_mean'].to_numpy()
+    for metric in METRICS:
+        count = summary['count'].to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            std = np.sqrt(summary[f'{metric}_m2'].to_numpy() / (count - 1))
+        result_df[f'{metric}_std'] = np.where(count > 1, std, np.nan)
+    result_df['padded_runs'] = summary['padded'].to_numpy().astype(int)
+    return result_df
+
+
+def empty_manifest():
+    return {'version': MANIFEST_VERSION, 'files': {}, 'store_rowid': 0, 'summary': None}
+
+
+def load_manifest(rate_dir_path):
+    """
+    Aggregation manifest of a rate directory: files already aggregated
+    (name -> [size, mtime]), last store row aggregated and the running summary.
+    """
+    manifest_file = rate_dir_path / MANIFEST_NAME
+    if not manifest_file.exists():
+        return empty_manifest()
+    try:
+        with open(manifest_file, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return empty_manifest()
+    if manifest.get('version') != MANIFEST_VERSION:
+        return empty_manifest()
+    return manifest
+
+
+def save_manifest(rate_dir_path, manifest):
+    rate_dir_path.mkdir(parents=True, exist_ok=True)
+    tmp_file = rate_dir_path / (MANIFEST_NAME + '.tmp')
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_file, rate_dir_path / MANIFEST_NAME)
+
+
+def padded_length(meta):
+    """
+    Length a run is padded to: its planned n_generations when its recorded
+    stop_reason is an early stop, None (no padding) when the run went to
+    max generations or its status is unknown (no meta, legacy CSV).
+    """
+    if not meta or meta.get('stop_reason') in (None, 'max generations') or 'n_generations' not in meta:
         return None
+    return int(meta['n_generations'])
 
-    print(f"\nProcessing {rate_name}: {len(csv_files)} CSV files")
-    all_dataframes = []
-    for csv_file in csv_files:
+
+def pad_run(df, n_generations):
+    """
+    Extend a run that stopped early up to n_generations by carrying its last
+    generation forward, flagged in a `padded` column (n_generations=None:
+    left as is). Best-so-far values do not change after a stop; the average
+    fitness is the one of the population frozen at the stop, so padded
+    generations bias its mean towards the stopped runs (the padded_runs
+    column of the output counts them).
+    """
+    last = int(df['generation'].max())
+    if n_generations is None or last + 1 >= n_generations:
+        return df.assign(padded=False)
+    df = df.set_index('generation').reindex(range(n_generations)).ffill()
+    df['padded'] = df.index > last
+    return df.rename_axis('generation').reset_index()
+
+
+def padding_rows(last_rows, lengths):
+    """
+    Store-side equivalent of pad_run: sums contributed by the last row of every
+    early-stopped run (lengths: run id -> padded_length) to the generations
+    after its stop, as generation_sums rows.
+    """
+    n_generations = max([length for length in lengths.values() if length is not None], default=0)
+    counts = np.zeros(n_generations + 1, dtype=int)
+    sums = np.zeros((n_generations + 1, 2 * len(METRICS)))
+    for run_id, generation, *values in last_rows:
+        length = lengths.get(run_id)
+        if length is None or generation + 1 >= length:
+            continue
+        # +1 from the generation after the stop, -1 from the end of the run's own length
+        counts[generation + 1] += 1
+        counts[length] -= 1
+        for i, value in enumerate(values):
+            sums[generation + 1, 2 * i] += value
+            sums[generation + 1, 2 * i + 1] += value * value
+            sums[length, 2 * i] -= value
+            sums[length, 2 * i + 1] -= value * value
+    counts = np.cumsum(counts)[:n_generations]
+    sums = np.cumsum(sums, axis=0)[:n_generations]
+    return [(g, int(counts[g]), *sums[g].tolist()) for g in range(n_generations) if counts[g]]
+
+
+def csv_run_metas(rate_dir_path):
+    """Meta of the CSV runs of a rate directory, by file name, from its runs.jsonl."""
+    return {f"results_{entry['run_id']}.csv": entry.get('meta') or {}
+            for entry in _read_index(rate_dir_path / RUNS_INDEX) if 'run_id' in entry}
+
+
+def read_run_files(rate_dir_path, names, already_read=None):
+    """
+    Read result CSVs (normalized column names), skipping unreadable ones
+    (they are left out of the result, hence of the manifest, and retried).
+    """
+    dataframes = {}
+    for name in names:
+        if already_read and name in already_read:
+            dataframes[name] = already_read[name]
+            continue
+        csv_file = rate_dir_path / name
         try:
             df = pd.read_csv(csv_file, delimiter=';')
             df.columns = [c.strip().lower().replace(' ', '_') for c in df.columns]
-            all_dataframes.append(df)
+            dataframes[name] = df
         except Exception as e:
-            print(f"  Warning: Could not read {csv_file}: {e}")
-            continue
+            print(f"  Warning: Could not read {csv_file} (will be retried): {e}")
+    return dataframes
 
-    if not all_dataframes:
+
+def process_mutation_rate_directory(rate_dir_path, output_dir, store_path=None, rebuild=False):
+    """
+    Process the CSV files of a mutation rate directory (plus the runs of that
+    rate in the results store, if any) and calculate mean and std by generation.
+    Running sums are kept in a manifest so only files added since the last
+    call are read; a modified or deleted file triggers a full rebuild.
+    Runs recorded as stopped early (stop_reason in runs.jsonl or the store
+    meta) are padded with their last generation up to their own
+    n_generations; runs of unknown status are left as they are.
+    """
+    rate_name = rate_dir_path.name
+    rate = rate_name[len('mutation_rate_'):]
+    csv_files = {}
+    if rate_dir_path.is_dir():
+        for entry in os.scandir(rate_dir_path):
+            if entry.name.endswith('.csv'):
+                stat = entry.stat()
+                csv_files[entry.name] = [stat.st_size, stat.st_mtime_ns]
+
+    manifest = load_manifest(rate_dir_path)
+    store_until = 0
+    if store_path is not None and Path(store_path).exists():
+        store_until = last_rowid(store_path)
+    if rebuild or store_until < manifest['store_rowid'] \
+            or any(csv_files.get(name) != stat for name, stat in manifest['files'].items()):
+        manifest = empty_manifest()
+
+    new_files = sorted(name for name in csv_files if name not in manifest['files'])
+    store_last = []
+    if store_until > manifest['store_rowid']:
+        store_last = last_rows(store_path, rate, since=manifest['store_rowid'], until=store_until)
+    dataframes = read_run_files(rate_dir_path, new_files)
+
+    summary = None
+    if manifest['summary'] is not None:
+        summary = pd.DataFrame(manifest['summary']).set_index('generation')
+    if summary is None and not new_files and not store_last:
+        print(f"No CSV files found in {rate_name}")
+        return None
+
+    print(f"\nProcessing {rate_name}: {len(new_files)} new CSV files ({len(manifest['files'])} already aggregated)")
+    for name in new_files:
+        if name in dataframes:  # a file that failed to parse is retried next time
+            manifest['files'][name] = csv_files[name]
+    metas = csv_run_metas(rate_dir_path) if dataframes else {}
+    runs = [pad_run(df, padded_length(metas.get(name))) for name, df in dataframes.items() if len(df)]
+    if runs:
+        summary = merge_summaries(summary, summarize(pd.concat(runs, ignore_index=True)))
+    if store_last:
+        print(f"  Adding {len(store_last)} runs from {store_path}")
+        store_rows = generation_sums(store_path, rate, since=manifest['store_rowid'], until=store_until)
+        summary = merge_summaries(summary, summary_from_sums(store_rows))
+        lengths = {run_id: padded_length(meta) for run_id, _, _, _, meta in list_runs(store_path, rate)}
+        padding = padding_rows(store_last, lengths)
+        if padding:
+            summary = merge_summaries(summary, summary_from_sums(padding, padded=True))
+    if summary is None:
         print(f"  No valid CSV files found in {rate_name}")
         return None
 
-    combined_df = pd.concat(all_dataframes, ignore_index=True)
-    mean_by_generation = combined_df.groupby('generation').agg({
-        'best_distance': 'mean',
-        'best_fitness': 'mean',
-        'average_fitness': 'mean'
-    }).reset_index()
-    std_by_generation = combined_df.groupby('generation').agg({
-        'best_distance': 'std',
-        'best_fitness': 'std',
-        'average_fitness': 'std'
-    }).reset_index()
-    std_columns = {col: f"{col}_std" for col in std_by_generation.columns if col != 'generation'}
-    std_by_generation = std_by_generation.rename(columns=std_columns)
-    result_df = mean_by_generation.merge(std_by_generation, on='generation')
+    manifest['store_rowid'] = max(store_until, manifest['store_rowid'])
+    manifest['summary'] = summary.reset_index().to_dict(orient='list')
+    save_manifest(rate_dir_path, manifest)
+
+    result_df = finalize(summary)
     output_file = Path(output_dir) / f"{rate_name}_mean.csv"
     result_df.to_csv(output_file, index=False)
-    print(f"  Processed {len(all_dataframes)} files")
+    print(f"  Processed {len(runs)} new files")
     print(f"  Generations: {result_df['generation'].min()} to {result_df['generation'].max()}")
+    if result_df['padded_runs'].any():
+        print(f"  Up to {result_df['padded_runs'].max()} runs padded with their last generation "
+              f"(best and average fitness carried forward, see padded_runs)")
     print(f"  Saved to: {output_file}")
     return result_df
 
-def main():
-    # MODIFY THESE PATHS FOR YOUR DATA:
-    data_path = Path("data")  # Your base data directory
-    output_dir = Path("output_means")  # Where to save mean CSV files
+def main(data_path="data", output_dir="output_means", plot=True, show=True, queue=None):
+    """
+    Aggregate every mutation rate of data_path into output_dir, then draw
+    the comparison plot (plot=False skips it, show=False only saves it).
+    Returns the per-generation means of every rate.
+    """
+    data_path = Path(data_path)  # Your base data directory
+    output_dir = Path(output_dir)  # Where to save mean CSV files
     output_dir.mkdir(exist_ok=True)
     processed_results = {}
 
     if data_path.exists():
+        store_path = data_path / Path(DEFAULT_STORE).name
         rate_directories = [d for d in data_path.iterdir() if d.is_dir() and d.name.startswith('mutation_rate_')]
+        if store_path.exists():
+            # Rates only present in the results store still get aggregated
+            known = {d.name for d in rate_directories}
+            rate_directories += [data_path / rate_folder_name(rate) for rate in list_rates(store_path)
+                                 if rate_folder_name(rate) not in known]
         rate_directories.sort()
         print(f"Found {len(rate_directories)} mutation rate directories:")
         for rate_dir in rate_directories:
             print(f"  {rate_dir.name}")
         for rate_dir in rate_directories:
-            result_df = process_mutation_rate_directory(rate_dir, output_dir)
+            result_df = process_mutation_rate_directory(rate_dir, output_dir, store_path)
             if result_df is not None:
                 processed_results[rate_dir.name] = result_df
         print(f"\n=== PROCESSING COMPLETE ===")
         print(f"Successfully processed {len(processed_results)} mutation rates")
         print(f"Mean CSV files saved to {output_dir}/ directory")
-        if processed_results:
-            create_comparison_plots(processed_results, output_dir)
+        if processed_results and plot:
+            create_comparison_plots(processed_results, output_dir, show, queue)
     else:
         print(f"Data directory {data_path} not found!")
         print("Please ensure your data is organized as: data/rate_X.X/resultsXXX.csv")
+    return processed_results
 
-def create_comparison_plots(processed_results, output_dir):
+def create_comparison_plots(processed_results, output_dir, show=True, queue=None):
+    """
+    Comparison figure of every rate, saved as output_dir/mutation_rate_comparison.png
+    (through the render queue when given; skipped if the means did not change).
+    """
     print(f"\nCreating comparative visualizations...")
-    fig, axes = plt.subplots(2, 2, figsize=(14, 10), constrained_layout=True)
+    data = {rate_name: {column: df[column].tolist() for column in df.columns}
+            for rate_name, df in sorted(processed_results.items())}
+    return rendering.plot("comparison_grid", data, str(output_dir), "mutation_rate_comparison", queue, show,
+                          timestamp=False)
+
+
+def draw_comparison(fig, data):
+    fig.set_layout_engine("constrained")
+    axes = fig.subplots(2, 2)
     colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b',"#f1d42bff","#040680","#ee25d3"]
     # Plot 1: Best Distance
     ax = axes[0, 0]
-    for i, (rate_name, df) in enumerate(sorted(processed_results.items())):
+    for i, (rate_name, df) in enumerate(sorted(data.items())):
         color = colors[i % len(colors)]
         ax.plot(df['generation'], df['best_distance'], label=rate_name.replace('_', ' '), color=color, linewidth=2)
-        if 'best_distance_std' in df.columns:
-            ax.fill_between(df['generation'], df['best_distance'] - df['best_distance_std'],
-                            df['best_distance'] + df['best_distance_std'], alpha=0.2, color=color)
+        if 'best_distance_std' in df:
+            ax.fill_between(df['generation'], np.subtract(df['best_distance'], df['best_distance_std']),
+                            np.add(df['best_distance'], df['best_distance_std']), alpha=0.2, color=color)
     ax.set_title('Best Distance Over Generations')
     ax.set_xlabel('Generation')
     ax.set_ylabel('Best Distance')
     ax.legend()
     # Plot 2: Best Fitness
     ax = axes[0, 1]
-    for i, (rate_name, df) in enumerate(sorted(processed_results.items())):
+    for i, (rate_name, df) in enumerate(sorted(data.items())):
         color = colors[i % len(colors)]
         ax.plot(df['generation'], df['best_fitness'], label=rate_name.replace('_', ' '), color=color, linewidth=2)
-        if 'best_fitness_std' in df.columns:
-            ax.fill_between(df['generation'], df['best_fitness'] - df['best_fitness_std'],
-                            df['best_fitness'] + df['best_fitness_std'], alpha=0.2, color=color)
+        if 'best_fitness_std' in df:
+            ax.fill_between(df['generation'], np.subtract(df['best_fitness'], df['best_fitness_std']),
+                            np.add(df['best_fitness'], df['best_fitness_std']), alpha=0.2, color=color)
     ax.set_title('Best Fitness Over Generations')
     ax.set_xlabel('Generation')
     ax.set_ylabel('Best Fitness')
     ax.legend()
     # Plot 3: Average Fitness
     ax = axes[1, 0]
-    for i, (rate_name, df) in enumerate(sorted(processed_results.items())):
+    for i, (rate_name, df) in enumerate(sorted(data.items())):
         color = colors[i % len(colors)]
         ax.plot(df['generation'], df['average_fitness'], label=rate_name.replace('_', ' '), color=color, linewidth=2)
-        if 'average_fitness_std' in df.columns:
-            ax.fill_between(df['generation'], df['average_fitness'] - df['average_fitness_std'],
-                            df['average_fitness'] + df['average_fitness_std'], alpha=0.2, color=color)
+        if 'average_fitness_std' in df:
+            ax.fill_between(df['generation'], np.subtract(df['average_fitness'], df['average_fitness_std']),
+                            np.add(df['average_fitness'], df['average_fitness_std']), alpha=0.2, color=color)
     ax.set_title('Average Fitness Over Generations')
     ax.set_xlabel('Generation')
     ax.set_ylabel('Average Fitness')
@@ -128,12 +371,11 @@ def create_comparison_plots(processed_results, output_dir):
     # Plot 4: Final performance comparison
     ax = axes[1, 1]
     final_metrics = {}
-    for rate_name, df in sorted(processed_results.items()):
-        final_10 = df.tail(10)
+    for rate_name, df in sorted(data.items()):
         final_metrics[rate_name] = {
-            'best_distance': final_10['best_distance'].mean(),
-            'best_fitness': final_10['best_fitness'].mean(),
-            'average_fitness': final_10['average_fitness'].mean()
+            'best_distance': np.mean(df['best_distance'][-10:]),
+            'best_fitness': np.mean(df['best_fitness'][-10:]),
+            'average_fitness': np.mean(df['average_fitness'][-10:])
         }
     rates = list(final_metrics.keys())
     x_pos = np.arange(len(rates))
@@ -147,11 +389,7 @@ def create_comparison_plots(processed_results, output_dir):
     ax.set_xticks(x_pos)
     ax.set_xticklabels([r.replace('_', ' ') for r in rates], rotation=45, ha='right')
     ax.legend()
-    plt.suptitle('Evolutionary Algorithm Performance by Mutation Rate', fontsize=16, fontweight='bold')
-    plot_file = output_dir / 'mutation_rate_comparison.png'
-    plt.savefig(plot_file, dpi=300, bbox_inches='tight')
-    plt.show()
-    print(f"Comparison plot saved to: {plot_file}")
+    fig.suptitle('Evolutionary Algorithm Performance by Mutation Rate', fontsize=16, fontweight='bold')
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,271 @@
+import datetime
+import hashlib
+import importlib
+import json
+import multiprocessing as mp
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+INDEX_NAME = ".render_index.json"
+SPRING_LIMIT = 60   # genealogies up to this many bees keep the spring layout
+LABEL_LIMIT = 150   # layered genealogies get bee labels up to this many bees
+FIGSIZE = (10, 6)
+
+# kind -> "module:function" drawing on a Figure, resolved in the process that renders
+DRAWERS = {
+    "best_path": "rendering:draw_best_path",
+    "fitness": "rendering:draw_fitness",
+    "rate_comparison": "rendering:draw_rate_comparison",
+    "genealogy": "rendering:draw_genealogy",
+    "comparison_grid": "mean_comparision:draw_comparison",
+}
+FIGSIZES = {"comparison_grid": (14, 10)}
+# kind -> "module:function" returning the matplotlib style(s) to draw it with
+STYLES = {"comparison_grid": "mean_comparision:comparison_style"}
+
+
+# --- Drawing (plain data in, no global pyplot state) ---
+
+def draw_best_path(fig, data):
+    hive, flowers, path = data["hive"], data["flowers"], data["path"]
+    x = [hive[0]] + [flowers[i][0] for i in path] + [hive[0]]
+    y = [hive[1]] + [flowers[i][1] for i in path] + [hive[1]]
+    ax = fig.add_subplot()
+    ax.scatter(*hive, color="red", s=120, marker="s", label="Hive")
+    ax.scatter([f[0] for f in flowers], [f[1] for f in flowers],
+               color="gold", s=100, marker="o", edgecolors="black", label="Flowers")
+    ax.plot(x, y, color="blue", linewidth=2, linestyle="-", label="Best Path")
+    ax.scatter(x, y, color="blue", s=40)
+    ax.set_title("Path of the Best Bee")
+    ax.legend()
+    ax.grid(True, linestyle="--", alpha=0.5)
+
+
+def draw_fitness(fig, data):
+    ax = fig.add_subplot()
+    ax.plot(data["best"], label="Best Fitness", color="blue")
+    ax.plot(data["avg"], label="Average Fitness", color="orange")
+    ax.set_title(f"Performance Evolution Across Generations (Mutation {data['rate']})")
+    ax.set_xlabel("Generations")
+    ax.set_ylabel("Fitness")
+    ax.legend()
+
+
+def draw_rate_comparison(fig, data):
+    ax = fig.add_subplot()
+    for label, values in data["series"]:
+        ax.plot(values, label=f"Mutation {label}")
+    ax.set_title(data["title"])
+    ax.set_xlabel("Generations")
+    ax.set_ylabel(data["ylabel"])
+    ax.legend()
+
+
+def layered_layout(nodes, edges):
+    """
+    Positions of a genealogy in O(V + E): one row per generation (y), bees
+    of a row spread evenly and ordered by the mean x of their children
+    (one barycenter pass from the newest generation down).
+    """
+    rows = {}
+    for node, generation in nodes:
+        rows.setdefault(generation, []).append(node)
+    children = {}
+    for parent, child in edges:
+        children.setdefault(parent, []).append(child)
+    pos = {}
+    for generation in sorted(rows, reverse=True):
+        row = rows[generation]
+        def barycenter(node):
+            xs = [pos[c][0] for c in children.get(node, ()) if c in pos]
+            return sum(xs) / len(xs) if xs else 0.5
+        row.sort(key=barycenter)
+        for i, node in enumerate(row):
+            pos[node] = ((i + 1) / (len(row) + 1), generation)
+    return pos
+
+
+def draw_genealogy(fig, data):
+    nodes, edges, root = data["nodes"], [tuple(e) for e in data["edges"]], data["root"]
+    ax = fig.add_subplot()
+    ax.set_title("Genealogy of the Best Bee")
+    if len(nodes) <= SPRING_LIMIT:
+        import networkx as nx
+        G = nx.DiGraph()
+        for bee_id, generation in nodes:
+            G.add_node(bee_id, label=f"Bee {bee_id} (Gen {generation})")
+        G.add_edges_from(edges)
+        pos = nx.spring_layout(G, seed=0)
+        labels = nx.get_node_attributes(G, 'label')
+        nx.draw(G, pos, ax=ax, with_labels=True, labels=labels,
+                node_size=600, node_color="lightblue", font_size=8)
+        return
+
+    from matplotlib.collections import LineCollection
+    pos = layered_layout(nodes, edges)
+    ax.add_collection(LineCollection([(pos[p], pos[c]) for p, c in edges], colors="grey",
+                                     linewidths=0.5, alpha=0.6))
+    xs, ys = zip(*(pos[node] for node, _ in nodes))
+    ax.scatter(xs, ys, s=max(4, 3000 / len(nodes)), color="lightblue", edgecolors="steelblue", zorder=2)
+    ax.scatter(*pos[root], s=120, color="red", zorder=3, label=f"Bee {root}")
+    if len(nodes) <= LABEL_LIMIT:
+        for node, _ in nodes:
+            ax.annotate(str(node), pos[node], fontsize=6, ha="center", va="bottom")
+    ax.set_xticks([])
+    ax.set_ylabel("Generation")
+    ax.legend(loc="lower right")
+    ax.text(0.01, 0.01, f"{len(nodes)} bees (sampled)", transform=ax.transAxes, fontsize=8)
+
+
+def _resolve(spec):
+    module, name = spec.split(":")
+    return getattr(importlib.import_module(module), name)
+
+
+def _drawer(kind):
+    return _resolve(DRAWERS[kind])
+
+
+def _style(kind):
+    """Style context of a kind, entered before its figure is created (figure settings are read then)."""
+    import matplotlib.style
+    return matplotlib.style.context(_resolve(STYLES[kind])() if kind in STYLES else [])
+
+
+def render(kind, data, filepath, dpi=300):
+    """Draw one plot into a PNG with the Agg canvas (runs in the render workers)."""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    with _style(kind):
+        fig = Figure(figsize=FIGSIZES.get(kind, FIGSIZE))
+        FigureCanvasAgg(fig)
+        _drawer(kind)(fig, data)
+        fig.savefig(filepath, dpi=dpi, bbox_inches="tight")
+    return filepath
+
+
+def show(kind, data):
+    """Draw one plot in a pyplot window and wait for it to be closed."""
+    import matplotlib.pyplot as plt
+    with _style(kind):
+        fig = plt.figure(figsize=FIGSIZES.get(kind, FIGSIZE))
+        _drawer(kind)(fig, data)
+        plt.show()
+    plt.close(fig)
+
+
+# --- Render queue ---
+
+def _jsonable(value):
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Cannot hash {type(value).__name__}")
+
+
+def content_hash(kind, data, dpi=300):
+    payload = json.dumps([kind, dpi, data], sort_keys=True, default=_jsonable)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _init_worker():
+    os.environ["MPLBACKEND"] = "Agg"
+
+
+class RenderQueue:
+    def __init__(self, workers=2):
+        """
+        Background plot rendering on a process pool (Agg backend, spawned
+        workers without GUI state): submit() returns at once and the
+        simulation goes on while figures are drawn. workers=0 renders in
+        the calling process.
+        A plot whose content hash (kind + data + dpi) already produced a PNG
+        still present in its folder is not rendered again; hashes are kept
+        in <folder>/.render_index.json.
+        """
+        self.workers = workers
+        self._executor = None
+        self._futures = []
+        self._lock = threading.Lock()
+
+    def submit(self, kind, data, folder, name, timestamp=True, dpi=300):
+        """Queue one plot; returns its future, or None when it is unchanged or rendered inline."""
+        os.makedirs(folder, exist_ok=True)
+        digest = content_hash(kind, data, dpi)
+        with self._lock:
+            previous = _load_index(folder).get(digest)
+        if previous and os.path.exists(os.path.join(folder, previous)):
+            print(f"[Plot unchanged] {os.path.join(folder, previous)}")
+            return None
+        if timestamp:
+            name = f"{name}_{datetime.datetime.now().strftime('%d%m%Y_%H%M%S')}"
+        filepath = os.path.join(folder, f"{name}.png")
+        if not self.workers:
+            render(kind, data, filepath, dpi)
+            self._saved(folder, digest, filepath)
+            return None
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=mp.get_context("spawn"),
+                                                 initializer=_init_worker)
+        future = self._executor.submit(render, kind, data, filepath, dpi)
+        future.add_done_callback(lambda f: self._done(f, folder, digest, filepath))
+        self._futures.append(future)
+        return future
+
+    def _done(self, future, folder, digest, filepath):
+        error = future.exception()
+        if error is not None:
+            print(f"[Plot failed] {filepath}: {error}")
+        else:
+            self._saved(folder, digest, filepath)
+
+    def _saved(self, folder, digest, filepath):
+        filename = os.path.basename(filepath)
+        with self._lock:
+            index = {h: f for h, f in _load_index(folder).items() if f != filename}
+            index[digest] = filename
+            _save_index(folder, index)
+        print(f"[Saved plot] {filepath}")
+
+    def wait(self):
+        """Block until every queued plot is written."""
+        futures, self._futures = self._futures, []
+        for future in futures:
+            future.exception()
+
+    def close(self):
+        self.wait()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _load_index(folder):
+    try:
+        with open(os.path.join(folder, INDEX_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_index(folder, index):
+    tmp_file = os.path.join(folder, INDEX_NAME + ".tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    os.replace(tmp_file, os.path.join(folder, INDEX_NAME))
+
+
+def plot(kind, data, folder, name, queue=None, show_window=False, timestamp=True):
+    """
+    Show the plot (optional, blocking) then save it: through the queue when
+    given, otherwise rendered right away.
+    """
+    if show_window:
+        show(kind, data)
+    return (queue or RenderQueue(workers=0)).submit(kind, data, folder, name, timestamp)
@@ -0,0 +1,130 @@
+import os
+import threading
+from collections import OrderedDict
+import pandas as pd
+from storage import DEFAULT_STORE, list_runs, load_run, rate_folder_name
+
+STORE_PREFIX = "store:"
+RATE_PREFIX = rate_folder_name("")
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class ResultsIndex:
+    def __init__(self, data_root="data", means_root="output_means", store_path=None, cache_size=64):
+        """
+        Index of the results tree (mutation folders, their CSV runs and the
+        runs of the SQLite store), built once and refreshed only when a
+        directory or store mtime changes. Parsed runs live in a bounded LRU
+        and per-rate aggregates come from the precomputed output_means files.
+        """
+        self.data_root = data_root
+        self.means_root = means_root
+        self.store_path = store_path or os.path.join(data_root, os.path.basename(DEFAULT_STORE))
+        self.cache_size = cache_size
+        self._folders = {}      # folder -> (dir mtime, sorted run names)
+        self._root_mtime = None
+        self._store_mtime = None
+        self._store_runs = {}   # folder -> [run ids]
+        self._runs = OrderedDict()
+        self._summaries = {}
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self):
+        """Re-scan only what changed since the last call (one stat per folder)."""
+        root_mtime = _mtime(self.data_root)
+        if root_mtime != self._root_mtime:
+            self._root_mtime = root_mtime
+            names = []
+            if root_mtime is not None:
+                # Only rate folders: checkpoints/, profiles/... hold no runs
+                names = sorted(f for f in os.listdir(self.data_root)
+                               if f.startswith(RATE_PREFIX) and os.path.isdir(os.path.join(self.data_root, f)))
+            self._folders = {name: self._folders.get(name, (None, [])) for name in names}
+
+        store_mtime = (_mtime(self.store_path), _mtime(self.store_path + "-wal"))
+        if store_mtime != self._store_mtime:
+            self._store_mtime = store_mtime
+            self._store_runs = {}
+            if store_mtime[0] is not None:
+                for run_id, rate, seed, n_generations, meta in list_runs(self.store_path):
+                    self._store_runs.setdefault(rate_folder_name(rate), []).append(run_id)
+
+        for name, (mtime, files) in self._folders.items():
+            current = _mtime(os.path.join(self.data_root, name))
+            if current != mtime:
+                files = sorted(f for f in os.listdir(os.path.join(self.data_root, name)) if f.endswith('.csv'))
+                self._folders[name] = (current, files)
+
+    def folders(self):
+        self.refresh()
+        return sorted(set(self._folders) | set(self._store_runs))
+
+    def runs(self, folder):
+        """CSV files of a folder, then the store runs of the same rate."""
+        self.refresh()
+        files = list(self._folders.get(folder, (None, []))[1])
+        return files + [STORE_PREFIX + run_id for run_id in self._store_runs.get(folder, [])]
+
+    def load(self, folder, name):
+        """One run as a DataFrame (CSV column names), through the LRU."""
+        if name.startswith(STORE_PREFIX):
+            source = self.store_path
+            key = (folder, name, self._store_mtime)
+        else:
+            source = os.path.join(self.data_root, folder, name)
+            key = (folder, name, _mtime(source))
+        with self._lock:
+            df = self._runs.get(key)
+            if df is not None:
+                self._runs.move_to_end(key)
+                return df
+        if name.startswith(STORE_PREFIX):
+            df = load_run(source, name[len(STORE_PREFIX):])
+        else:
+            df = pd.read_csv(source, sep=';')
+        with self._lock:
+            self._runs[key] = df
+            if len(self._runs) > self.cache_size:
+                self._runs.popitem(last=False)
+        return df
+
+    def version(self, folder, name=None):
+        """
+        Token identifying the current content of a run (or of the rate
+        summary when name is None), for cache keys and ETags.
+        """
+        if name is None:
+            path = os.path.join(self.means_root, f"{folder}_mean.csv")
+            return f"{path}:{_mtime(path)}"
+        if name.startswith(STORE_PREFIX):
+            return f"{self.store_path}:{name}:{self._store_mtime}"
+        path = os.path.join(self.data_root, folder, name)
+        return f"{path}:{_mtime(path)}"
+
+    def summary(self, folder):
+        """
+        Per-generation mean of a rate from output_means/<folder>_mean.csv,
+        with the CSV column names, or None when it has not been aggregated.
+        """
+        path = os.path.join(self.means_root, f"{folder}_mean.csv")
+        mtime = _mtime(path)
+        if mtime is None:
+            return None
+        cached = self._summaries.get(folder)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        df = pd.read_csv(path).rename(columns={
+            'generation': 'Generation',
+            'best_distance': 'Best Distance',
+            'best_fitness': 'Best Fitness',
+            'average_fitness': 'Average Fitness',
+        })
+        self._summaries[folder] = (mtime, df)
+        return df
@@ -0,0 +1,187 @@
+import json
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import beehive
+from beehive import FitnessCache
+from checkpoint import SweepLedger, checkpoint_path, config_digest, remove_checkpoint
+from fields import init_worker_field, make_problem, worker_field
+from live import LivePublisher
+from simulation import run_simulation
+from storage import CsvSink, MemorySink
+
+
+def task_seed(master_seed, rate_index, repetition):
+    """
+    Deterministic and independent seed of one (rate, repetition) cell,
+    derived from the master seed.
+    """
+    sequence = np.random.SeedSequence(master_seed, spawn_key=(rate_index, repetition))
+    return int(sequence.generate_state(1)[0])
+
+
+def sweep_run_id(digest, rate, repetition, seed):
+    """
+    Run id of a sweep cell: digest (see run_digest) tells apart sweeps with
+    other settings, the seed alone depends on the rate position, not its value.
+    """
+    return f"{digest}_{rate}_{repetition:04d}_{seed}"
+
+
+def sweep_config(flowers, hive, pop_size, n_generations, master_seed, sink=None):
+    """
+    What the runs of a sweep depend on besides their cell (field digest,
+    population, generations, master seed), plus where they are stored (the
+    sink's file or folder): a ledger of one configuration is never used by
+    another.
+    """
+    field = json.dumps([hive, *flowers], default=float).encode("utf-8")
+    target = getattr(sink, "path", getattr(sink, "data_root", None))
+    return {"field": f"{zlib.crc32(field):08x}", "n_flowers": len(flowers), "pop_size": pop_size,
+            "n_generations": n_generations, "master_seed": master_seed,
+            "target": os.path.abspath(target) if target is not None else None}
+
+
+def run_digest(config):
+    """Digest of a sweep_config without its target: the same runs get the same ids in any store."""
+    return config_digest(dict(config, target=None))
+
+
+_publishers = {}
+
+
+def _publisher(address):
+    """One LivePublisher per worker process and address."""
+    if address is None:
+        return None
+    address = tuple(address)
+    if address not in _publishers:
+        _publishers[address] = LivePublisher(address)
+    return _publishers[address]
+
+
+def _run_task(task):
+    """Worker entry point: run one simulation with its own seed, on the field of the worker."""
+    rate, repetition, seed, digest, pop_size, n_generations, stop, live, checkpoints, hooks = task
+    flowers, hive, problem = worker_field()
+    beehive.BEE_COUNTER = 0
+    sink = MemorySink()
+    run_id = sweep_run_id(digest, rate, repetition, seed)
+    checkpoint, checkpoint_every = None, None
+    if checkpoints is not None:
+        checkpoint, checkpoint_every = checkpoint_path(run_id, checkpoints[0]), checkpoints[1]
+    history_best, history_avg, folder, run_id = run_simulation(
+        rate, flowers, hive, pop_size, n_generations, problem=problem,
+        run_id=run_id, verbose=False, sink=sink, seed=seed, cache=FitnessCache(),
+        stop=stop, live=_publisher(live), checkpoint=checkpoint, checkpoint_every=checkpoint_every,
+        keep_checkpoint=True, hooks=hooks() if hooks is not None else None
+    )
+    return rate, repetition, seed, history_best, history_avg, sink.runs[0]
+
+
+def run_sweep(rates, repetitions, flowers, hive, pop_size, n_generations, workers=None, master_seed=1234,
+              sink=None, stop=None, live=None, ledger=None, checkpoint_dir=None, checkpoint_every=50,
+              hooks=None, ledger_batch=100):
+    """
+    Run every (rate, repetition) cell of a sweep over a process pool.
+    Each cell has its own seed (recorded with its run) so results do not
+    depend on the worker count, and replay_cell re-runs any single cell.
+    Workers send their rows back and the parent writes them to the sink
+    (default: one CSV per run in data/mutation_rate_X/). stop is the list of
+    termination criteria applied to every run. live is the (host, port) of
+    a live dashboard to stream per-generation stats to.
+    ledger (a SweepLedger or its path) makes the sweep restartable: cells it
+    lists are skipped and each stored run is added to it. With a
+    checkpoint_dir, runs save a checkpoint every checkpoint_every
+    generations (in a subfolder named after run_digest, like the run ids)
+    and an interrupted cell resumes from it. A ledger made by another sweep_config
+    raises ValueError (see ledger_path for one ledger per configuration). Finished runs are
+    committed ledger_batch at a time: sink flush, then ledger entries, then
+    removal of their checkpoints, so a crash at worst re-runs (from their
+    checkpoints) runs already stored, which the store ignores.
+    hooks is a Hooks class (e.g. instrumentation.PhaseTimer) instantiated
+    for every run; what it adds to the run metadata is stored with the run.
+    Returns a list of (rate, repetition, seed, history_best, history_avg, location)
+    for the cells run by this call.
+    """
+    if sink is None:
+        sink = CsvSink()
+    config = sweep_config(flowers, hive, pop_size, n_generations, master_seed, sink)
+    digest = run_digest(config)
+    if isinstance(ledger, str):
+        ledger = SweepLedger(ledger, config)
+    elif ledger is not None:
+        ledger.claim(config)
+    if checkpoint_dir is not None:
+        checkpoint_dir = os.path.join(checkpoint_dir, digest)
+    checkpoints = (checkpoint_dir, checkpoint_every) if checkpoint_dir is not None else None
+    tasks = [(rate, rep, task_seed(master_seed, i, rep), digest, pop_size, n_generations, stop, live, checkpoints,
+              hooks)
+             for rep in range(repetitions)
+             for i, rate in enumerate(rates)]
+    if ledger is not None:
+        pending = [task for task in tasks if not ledger.done(*task[:3])]
+        if len(pending) < len(tasks):
+            print(f"[Sweep] {len(tasks) - len(pending)} cells already done, {len(pending)} to run")
+        tasks = pending
+    workers = workers or os.cpu_count() or 1
+
+    results = []
+    pending = [] if ledger is not None or checkpoint_dir is not None else None
+
+    def collect(result):
+        results.append(_collect(result, sink, pending))
+        if pending is not None and len(pending) >= ledger_batch:
+            _commit(sink, ledger, pending, checkpoint_dir)
+
+    if workers == 1:
+        init_worker_field(flowers, hive)
+        for task in tasks:
+            collect(_run_task(task))
+    else:
+        chunksize = max(1, len(tasks) // (workers * 8))
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker_field,
+                                 initargs=(flowers, hive)) as executor:
+            for result in executor.map(_run_task, tasks, chunksize=chunksize):
+                collect(result)
+    sink.flush()
+    if pending:
+        _commit(sink, ledger, pending, checkpoint_dir)
+    return results
+
+
+def _collect(result, sink, pending=None):
+    """Write one finished run to the sink (pending its commit, see _commit) and report it."""
+    rate, repetition, seed, history_best, history_avg, (run_id, _, rows, _, meta) = result
+    location = sink.write_run(run_id, rate, rows, seed=seed, meta=meta)
+    if pending is not None:
+        pending.append((rate, repetition, seed, run_id))
+    print(f"[Sweep] Mutation={rate} | Run {repetition} | Best distance: {1 / history_best[-1]:.2f}")
+    return rate, repetition, seed, history_best, history_avg, location
+
+
+def _commit(sink, ledger, pending, checkpoint_dir):
+    """Flush the sink, then record the pending runs in the ledger and remove their checkpoints."""
+    sink.flush()
+    if ledger is not None:
+        ledger.mark_many(pending)
+    if checkpoint_dir is not None:
+        for _, _, _, run_id in pending:
+            remove_checkpoint(checkpoint_path(run_id, checkpoint_dir))
+    pending.clear()
+
+
+def replay_cell(rates, rate_index, repetition, flowers, hive, pop_size, n_generations, master_seed=1234,
+                **kwargs):
+    """
+    Replay one (rate, repetition) cell of a sweep on its own, e.g. to profile
+    it: same seed, hence same run, without running the cells before it.
+    Extra keyword arguments go to run_simulation (sink, verbose, genealogy...).
+    """
+    seed = task_seed(master_seed, rate_index, repetition)
+    digest = run_digest(sweep_config(flowers, hive, pop_size, n_generations, master_seed))
+    kwargs.setdefault("run_id", sweep_run_id(digest, rates[rate_index], repetition, seed))
+    kwargs.setdefault("problem", make_problem(flowers, hive))
+    kwargs.setdefault("cache", FitnessCache())
+    return run_simulation(rates[rate_index], flowers, hive, pop_size, n_generations, seed=seed, **kwargs)
@@ -0,0 +1,162 @@
+import itertools
+import json
+import math
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import beehive
+from beehive import FitnessCache, Selection
+from checkpoint import checkpoint_path
+from fields import init_worker_field, worker_field
+from simulation import run_simulation
+from storage import MemorySink
+
+DEFAULT_AUDIT = os.path.join("data", "schedule_audit.json")
+
+
+def config_grid(mutation_rates, pop_sizes=(101,), proportions=(0.5,)):
+    """Every (mutation rate, population size, selection proportion) combination."""
+    return [{"mutation_rate": rate, "pop_size": pop_size, "proportion": proportion}
+            for rate, pop_size, proportion in itertools.product(mutation_rates, pop_sizes, proportions)]
+
+
+def config_seed(master_seed, config_index, repetition):
+    """
+    Seed of one run of a configuration. It does not depend on the round:
+    a run started in a later round is the one it would have been in the
+    first round.
+    """
+    sequence = np.random.SeedSequence(master_seed, spawn_key=(config_index, repetition))
+    return int(sequence.generate_state(1)[0])
+
+
+def _config_run_id(config_index, repetition, seed):
+    return f"c{config_index:03d}_{repetition:04d}_{seed}"
+
+
+def _run_config(task):
+    """
+    Worker entry point: one run of a configuration up to n_generations,
+    resumed from its checkpoint (the end of its previous round) if any and
+    checkpointed again at the end for the next round.
+    """
+    config_index, repetition, seed, config, n_generations, checkpoint = task
+    flowers, hive, problem = worker_field()
+    beehive.BEE_COUNTER = 0
+    sink = MemorySink()
+    run_simulation(
+        config["mutation_rate"], flowers, hive, config["pop_size"], n_generations,
+        problem=problem, run_id=_config_run_id(config_index, repetition, seed), verbose=False,
+        sink=sink, seed=seed, cache=FitnessCache(),
+        selection_scheme=Selection("uniform", proportion=config["proportion"]),
+        checkpoint=checkpoint, checkpoint_every=n_generations, keep_checkpoint=True
+    )
+    return config_index, repetition, sink.runs[0]
+
+
+def halving_schedule(n_configs, n_generations, eta=2):
+    """
+    Generations of every round of successive_halving, Hyperband style: one
+    round per halving (by eta) of n_configs down to one, the last round
+    reaching n_generations and each round 1/eta of the next one.
+    """
+    rounds, alive = 1, n_configs
+    while math.ceil(alive / eta) > 1:
+        alive = math.ceil(alive / eta)
+        rounds += 1
+    return [max(1, math.ceil(n_generations / eta ** (rounds - 1 - r))) for r in range(rounds)]
+
+
+def successive_halving(configs, flowers, hive, n_generations, runs=10, eta=2,
+                       workers=None, master_seed=1234, sink=None, audit_path=DEFAULT_AUDIT):
+    """
+    Adaptive sweep: successive halving over configurations (see config_grid).
+    Each round runs every surviving configuration `runs` times, ranks them
+    by mean best distance at the last generation of the round and keeps the
+    best 1/eta of them, until one is left.
+    The generations of a round are eta times those of the previous one (see
+    halving_schedule), so the last round reaches n_generations. Survivors
+    are not restarted: their runs resume from the checkpoint of the previous
+    round (kept in a temporary directory) and only the new generations are
+    computed.
+    Every decision is written to the audit (a JSON list, one entry per
+    configuration and round: statistics, rank, cutoff, kept or eliminated
+    and why, generations computed in the round) at audit_path. Runs of the
+    last round go to the sink if given.
+    Returns (best_config, audit).
+    """
+    workers = workers or os.cpu_count() or 1
+    alive = list(range(len(configs)))
+    audit = []
+    schedule = halving_schedule(len(configs), n_generations, eta)
+    previous_generations = 0
+    checkpoints = tempfile.TemporaryDirectory(prefix="schedule_")
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker_field, initargs=(flowers, hive))
+    else:
+        executor = None
+        init_worker_field(flowers, hive)
+    try:
+        for round_index, generations in enumerate(schedule):
+            tasks = []
+            for c in alive:
+                for rep in range(runs):
+                    seed = config_seed(master_seed, c, rep)
+                    checkpoint = checkpoint_path(_config_run_id(c, rep, seed), checkpoints.name)
+                    tasks.append((c, rep, seed, configs[c], generations, checkpoint))
+            # Generations computed this round by each configuration (resumed runs only add their tail)
+            computed = (generations - previous_generations) * runs
+            if executor is None:
+                results = list(map(_run_config, tasks))
+            else:
+                results = list(executor.map(_run_config, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+
+            final_best = {c: [] for c in alive}
+            for c, _, (_, _, rows, _, _) in results:
+                final_best[c].append(rows[-1][1])
+            stats = {c: (float(np.mean(v)), float(np.std(v, ddof=1)) if len(v) > 1 else 0.0)
+                     for c, v in final_best.items()}
+            ranking = sorted(alive, key=lambda c: (stats[c][0], c))
+            last_round = round_index == len(schedule) - 1
+            n_keep = 1 if last_round else math.ceil(len(alive) / eta)
+            best_mean = stats[ranking[0]][0]
+            cutoff = stats[ranking[n_keep - 1]][0]
+
+            for rank, c in enumerate(ranking, start=1):
+                mean, std = stats[c]
+                kept = rank <= n_keep
+                if kept:
+                    reason = "best configuration" if last_round else f"in the top {n_keep} of {len(alive)}"
+                else:
+                    gap = (mean - cutoff) / (std / math.sqrt(runs)) if std else math.inf
+                    reason = (f"rank {rank}/{len(alive)}: mean best distance {mean:.2f} "
+                              f"> cutoff {cutoff:.2f} ({gap:.1f} standard errors), best {best_mean:.2f}")
+                audit.append({
+                    "round": round_index, "generations": generations, "runs": runs,
+                    "config": configs[c], "mean_best_distance": mean, "std_best_distance": std,
+                    "rank": rank, "cutoff": cutoff, "status": "kept" if kept else "eliminated", "reason": reason,
+                    "generations_computed": computed,
+                })
+            print(f"[Schedule] Round {round_index} | {generations} generations x {runs} runs | "
+                  f"{len(alive)} -> {n_keep} configurations | {computed * len(alive)} generations computed")
+
+            alive = ranking[:n_keep]
+            previous_generations = generations
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        checkpoints.cleanup()
+
+    if sink is not None:
+        for c, repetition, (run_id, rate, rows, seed, meta) in results:
+            meta = dict(meta, config=configs[c], round=round_index)
+            sink.write_run(run_id, rate, rows, seed=seed, meta=meta)
+        sink.flush()
+    if audit_path:
+        folder = os.path.dirname(audit_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(audit_path, "w", encoding="utf-8") as f:
+            json.dump(audit, f, indent=2)
+    return configs[alive[0]], audit
@@ -0,0 +1,196 @@
+import os
+import time
+import numpy as np
+from beehive import *
+from checkpoint import load_checkpoint, remove_checkpoint, save_checkpoint
+from genealogy import Genealogy
+from stopping import RunState, check_stop
+from storage import CsvSink, new_run_id, rate_folder_name
+
+
+def run_simulation(mutation_rate, flowers, hive, pop_size, n_generations, genealogy=False, problem=None,
+                   run_id=None, verbose=True, sink=None, seed=None, cache=None, local_search=None,
+                   stop=None, live=None, selection_scheme=None, checkpoint=None, checkpoint_every=50,
+                   keep_checkpoint=False, hooks=None, genealogy_prune_every=32):
+    """
+    Run one simulation with a given mutation rate.
+    Save results through a sink (default: one CSV in data/mutation_rate_X/) and return stats.
+    The population is a Population (one permutation matrix plus parallel
+    arrays), offspring are made in one vectorized call per generation.
+    If a Problem is given, the population is scored in one vectorized call
+    per generation instead of bee by bee. Only new bees are scored; an optional
+    FitnessCache also skips paths already seen.
+    local_search (a LocalSearch) adds a memetic 2-opt/Or-opt step on the
+    elites or on the offspring, within its move/time budget.
+    stop is a list of termination criteria (see stopping.py); the stop reason
+    and generation are recorded with the run.
+    live (a LivePublisher) receives per-generation stats for the live dashboard.
+    selection_scheme (a Selection) replaces the full sort + elitist half +
+    uniform parents with O(n) truncation and vectorized parent sampling.
+    Every random draw of the run comes from generators derived from seed
+    (see run_rngs), never from the global random state: the seed is recorded
+    with the run and run_simulation(..., seed=seed) replays it on its own.
+    Without a seed a fresh one is drawn (and recorded).
+    checkpoint is a file path: every checkpoint_every generations the
+    population, random states and history are saved there, and a run started
+    with an existing checkpoint resumes from it (with the checkpoint's seed)
+    and gives the same results as an uninterrupted one. The file is removed
+    once the run is handed to the sink, unless keep_checkpoint=True: the
+    last generation is then checkpointed too (when it is a multiple of
+    checkpoint_every), so a later call with more generations extends the
+    run, and the caller removes the file when it is done with it (run_sweep
+    does after the sink flush and ledger entry). A resumed genealogy starts
+    at the checkpoint.
+    hooks (a Hooks, e.g. instrumentation.PhaseTimer) is called at the start
+    and end of the run and of each generation, after each phase and after
+    the evaluation; rows are unchanged and its meta entries are stored.
+    run_id keys the run in the results (default: unique timestamp id) and
+    verbose toggles the per-generation print.
+    If genealogy=True → returns (best_bee, history_best, history_avg, genealogy, folder, csv_filename),
+    where genealogy only keeps the parent edges of lineages still alive,
+    pruned every genealogy_prune_every generations (0: never).
+    Otherwise → returns (history_best, history_avg, folder, csv_filename).
+    """
+
+    if run_id is None:
+        run_id = new_run_id()
+    if sink is None:
+        sink = CsvSink()
+    # Folder of this rate (plots go there); created only by whatever writes into it
+    folder = os.path.join(getattr(sink, "data_root", "data"), rate_folder_name(mutation_rate))
+    resumed = load_checkpoint(checkpoint) if checkpoint is not None else None
+    if resumed is not None:
+        seed = resumed["seed"]
+    elif seed is None:
+        seed = new_seed()
+    rng, np_rng = run_rngs(seed)
+
+    state = RunState()
+    if resumed is None:
+        first_gen = 0
+        population = Population.random(pop_size, len(flowers), np_rng)
+        history_best = []
+        history_avg = []
+        rows = []  # buffered, handed to the sink once the run is over
+    else:
+        first_gen = resumed["generation"]
+        population = resumed["population"]
+        history_best = resumed["history_best"]
+        history_avg = resumed["history_avg"]
+        rows = resumed["rows"]
+        state.best_distances = resumed["best_distances"]
+        rng.setstate(resumed["rng"])
+        np_rng.bit_generator.state = resumed["np_rng"]
+    stop_reason = "max generations"
+    tree = Genealogy(genealogy_prune_every) if genealogy else None
+    if genealogy:
+        tree.record(population)
+
+    if hooks is not None:
+        hooks.on_run_start(run_id, mutation_rate)
+    generation_start = time.perf_counter()
+    for gen in range(first_gen, n_generations):
+        if hooks is not None:
+            hooks.on_generation_start(gen)
+        # Evaluate (new bees only)
+        evaluated = population.evaluate(flowers, hive, problem, cache)
+        if hooks is not None:
+            hooks.on_phase("evaluate")
+            hooks.on_evaluate(gen, population, evaluated, cache)
+        if local_search is not None and local_search.target == "elites":
+            local_search.apply(local_search.targets(population, ()))
+            if hooks is not None:
+                hooks.on_phase("local_search")
+
+        if selection_scheme is None:
+            # Sort by fitness
+            population = population.take(population.order())
+            best = population[0]
+        else:
+            best = population[int(np.argmax(population.fitness))]
+        avg = float(population.fitness.mean())
+        history_best.append(best.fitness)
+        history_avg.append(avg)
+        rows.append((gen, best.distance, best.fitness, avg))
+        if hooks is not None:
+            hooks.on_phase("sort")
+
+        if verbose:
+            print(f"[Mutation={mutation_rate}] Gen {gen} | Best distance: {best.distance:.2f}")
+            if hooks is not None:
+                hooks.on_phase("print")
+
+        if live is not None:
+            now = time.perf_counter()
+            live.publish({
+                "run_id": run_id, "rate": mutation_rate, "generation": gen,
+                "best_distance": best.distance, "best_fitness": best.fitness, "average_fitness": avg,
+                "best_path": best.path, "diversity": diversity(population),
+                "generation_time": now - generation_start,
+            })
+            generation_start = now
+            if hooks is not None:
+                hooks.on_phase("live")
+
+        # Termination criteria
+        if stop:
+            state.best_distances.append(best.distance)
+            state.population = population
+            reason = check_stop(stop, state)
+            if hooks is not None:
+                hooks.on_phase("stop")
+            if reason is not None:
+                stop_reason = reason
+                if hooks is not None:
+                    hooks.on_generation_end(gen, population, best, avg)
+                break
+
+        # Selection + reproduction + mutation
+        if selection_scheme is None:
+            selected = selection(population, proportion=0.5)
+            pairs = uniform_pairs(len(selected), pop_size - len(selected), np_rng)
+        else:
+            selected, pairs = selection_scheme.select(population, pop_size, np_rng)
+        if hooks is not None:
+            hooks.on_phase("selection")
+        offspring = selected.offspring(pairs, mutation_rate, np_rng)
+        if hooks is not None:
+            hooks.on_phase("reproduce")
+        if local_search is not None and local_search.target == "offspring":
+            local_search.apply(local_search.targets(selected, offspring))
+            if hooks is not None:
+                hooks.on_phase("local_search")
+
+        population = selected + offspring
+        if genealogy:
+            tree.record(offspring)
+            tree.step(population)
+            if hooks is not None:
+                hooks.on_phase("genealogy")
+
+        if checkpoint is not None and (gen + 1) % checkpoint_every == 0 \
+                and (gen + 1 < n_generations or keep_checkpoint):
+            save_checkpoint(checkpoint, gen + 1, population, rng, np_rng, history_best, history_avg, rows,
+                            state.best_distances, seed)
+            if hooks is not None:
+                hooks.on_phase("checkpoint")
+        if hooks is not None:
+            hooks.on_generation_end(gen, population, best, avg)
+
+    if live is not None:
+        live.flush()
+
+    meta = {"n_generations": n_generations, "stop_reason": stop_reason,
+            "stop_generation": rows[-1][0] if rows else None}
+    if hooks is not None:
+        hooks.on_run_end(run_id, meta)
+    csv_filename = sink.write_run(run_id, mutation_rate, rows, seed=seed, meta=meta)
+    if hooks is not None:
+        hooks.on_run_stored(run_id, csv_filename)
+    if checkpoint is not None and not keep_checkpoint:
+        remove_checkpoint(checkpoint)
+
+    if genealogy:
+        return population[0].to_bee(), history_best, history_avg, tree, folder, csv_filename
+    else:
+        return history_best, history_avg, folder, csv_filename
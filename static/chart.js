@@ -0,0 +1,77 @@
+// Petit traceur de courbes sur <canvas>, sans dépendance externe.
+// series : { label: { x: [...], y: [...] } }
+const COLORS = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b',
+                '#e377c2', '#7f7f7f', '#bcbd22', '#17becf', '#040680', '#ee25d3'];
+
+function drawChart(canvas, series, options) {
+    const ctx = canvas.getContext('2d');
+    const width = canvas.width, height = canvas.height;
+    const margin = { left: 80, right: 20, top: 30, bottom: 45 };
+    const labels = Object.keys(series);
+
+    let xMin = Infinity, xMax = -Infinity, yMin = Infinity, yMax = -Infinity;
+    for (const label of labels) {
+        const s = series[label];
+        for (let i = 0; i < s.x.length; i++) {
+            if (s.y[i] === null || Number.isNaN(s.y[i])) continue;
+            xMin = Math.min(xMin, s.x[i]); xMax = Math.max(xMax, s.x[i]);
+            yMin = Math.min(yMin, s.y[i]); yMax = Math.max(yMax, s.y[i]);
+        }
+    }
+    if (!Number.isFinite(xMin)) return;
+    if (xMax === xMin) xMax = xMin + 1;
+    if (yMax === yMin) yMax = yMin + 1;
+
+    const px = x => margin.left + (x - xMin) / (xMax - xMin) * (width - margin.left - margin.right);
+    const py = y => height - margin.bottom - (y - yMin) / (yMax - yMin) * (height - margin.top - margin.bottom);
+
+    ctx.clearRect(0, 0, width, height);
+    ctx.font = '12px Arial';
+    ctx.strokeStyle = '#333';
+    ctx.fillStyle = '#333';
+
+    // Axes et graduations
+    ctx.beginPath();
+    ctx.moveTo(margin.left, margin.top);
+    ctx.lineTo(margin.left, height - margin.bottom);
+    ctx.lineTo(width - margin.right, height - margin.bottom);
+    ctx.stroke();
+    for (let k = 0; k <= 5; k++) {
+        const x = xMin + (xMax - xMin) * k / 5, y = yMin + (yMax - yMin) * k / 5;
+        ctx.textAlign = 'center';
+        ctx.fillText(Math.round(x), px(x), height - margin.bottom + 15);
+        ctx.textAlign = 'right';
+        ctx.fillText(y.toPrecision(3), margin.left - 5, py(y) + 4);
+    }
+    ctx.textAlign = 'center';
+    ctx.fillText(options.xlabel || '', (margin.left + width - margin.right) / 2, height - 10);
+    ctx.font = 'bold 14px Arial';
+    ctx.fillText(options.title || '', width / 2, 18);
+    ctx.save();
+    ctx.translate(15, height / 2);
+    ctx.rotate(-Math.PI / 2);
+    ctx.font = '12px Arial';
+    ctx.fillText(options.ylabel || '', 0, 0);
+    ctx.restore();
+
+    // Courbes et légende
+    labels.forEach((label, i) => {
+        const s = series[label];
+        ctx.strokeStyle = COLORS[i % COLORS.length];
+        ctx.lineWidth = 1.5;
+        ctx.beginPath();
+        s.x.forEach((x, j) => j ? ctx.lineTo(px(x), py(s.y[j])) : ctx.moveTo(px(x), py(s.y[j])));
+        ctx.stroke();
+        ctx.fillStyle = ctx.strokeStyle;
+        ctx.fillRect(width - margin.right - 170, margin.top + 5 + i * 16, 12, 3);
+        ctx.fillStyle = '#333';
+        ctx.textAlign = 'left';
+        ctx.fillText(label, width - margin.right - 152, margin.top + 10 + i * 16);
+    });
+}
+
+function loadChart(canvas, build, options) {
+    return fetch(canvas.dataset.src)
+        .then(response => response.json())
+        .then(data => drawChart(canvas, build(data), options));
+}
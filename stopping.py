@@ -0,0 +1,71 @@
+import time
+from beehive import diversity
+
+
+class StallWindow:
+    def __init__(self, window=50, tolerance=1e-9):
+        """Stop when the best distance has not improved for `window` generations."""
+        self.window = window
+        self.tolerance = tolerance
+
+    def check(self, state):
+        history = state.best_distances
+        if len(history) <= self.window:
+            return None
+        if history[-self.window - 1] - history[-1] <= self.tolerance:
+            return f"stall ({self.window} generations without improvement)"
+        return None
+
+
+class TargetDistance:
+    def __init__(self, target):
+        """Stop as soon as a path at least as short as `target` is found."""
+        self.target = target
+
+    def check(self, state):
+        if state.best_distances[-1] <= self.target:
+            return f"target distance {self.target} reached"
+        return None
+
+
+class DiversityFloor:
+    def __init__(self, min_unique_ratio=0.05):
+        """Stop when the share of distinct paths in the population falls below the floor."""
+        self.min_unique_ratio = min_unique_ratio
+
+    def check(self, state):
+        ratio = diversity(state.population)
+        if ratio < self.min_unique_ratio:
+            return f"diversity {ratio:.3f} below {self.min_unique_ratio}"
+        return None
+
+
+class TimeBudget:
+    def __init__(self, seconds):
+        """Stop once the run has used `seconds` of wall-clock time."""
+        self.seconds = seconds
+
+    def check(self, state):
+        if state.elapsed() >= self.seconds:
+            return f"time budget of {self.seconds}s used"
+        return None
+
+
+class RunState:
+    def __init__(self):
+        """What the criteria can look at: best distance history, current population, clock."""
+        self.best_distances = []
+        self.population = []
+        self.started = time.perf_counter()
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def check_stop(criteria, state):
+    """First stop reason given by the criteria, or None to keep going."""
+    for criterion in criteria:
+        reason = criterion.check(state)
+        if reason is not None:
+            return reason
+    return None
@@ -0,0 +1,249 @@
+import csv
+import datetime
+import json
+import os
+import sqlite3
+import uuid
+from contextlib import closing
+
+COLUMNS = ["Generation", "Best Distance", "Best Fitness", "Average Fitness"]
+DEFAULT_STORE = os.path.join("data", "results.sqlite")
+RUNS_INDEX = "runs.jsonl"
+
+
+def new_run_id():
+    """Unique run id: timestamp (same format as the old CSV names) + random suffix."""
+    timestamp = datetime.datetime.now().strftime("%d%m%Y_%H%M%S")
+    return f"{timestamp}_{uuid.uuid4().hex[:8]}"
+
+
+def rate_folder_name(rate):
+    return f"mutation_rate_{rate}"
+
+
+class CsvSink:
+    def __init__(self, data_root="data"):
+        """
+        One CSV file per run in data/mutation_rate_X/ (historical layout),
+        seed and metadata in runs.jsonl next to them, one line per run id
+        (a run written again replaces its line).
+        Rows are buffered and written in one go when the run ends.
+        """
+        self.data_root = data_root
+        self._indexed = {}  # folder -> run ids of its runs.jsonl
+
+    def write_run(self, run_id, rate, rows, seed=None, meta=None):
+        folder = os.path.join(self.data_root, rate_folder_name(rate))
+        os.makedirs(folder, exist_ok=True)
+        csv_filename = os.path.join(folder, f"results_{run_id}.csv")
+        with open(csv_filename, mode="w", newline="", encoding="utf-8") as csv_file:
+            writer = csv.writer(csv_file, delimiter=";")
+            writer.writerow(COLUMNS)
+            writer.writerows(rows)
+        if seed is not None or meta:
+            # Side index of run metadata (seed, stop reason...), not a *.csv so readers skip it
+            self._index(folder, {"run_id": run_id, "seed": seed, "meta": meta or {}})
+        return csv_filename
+
+    def _index(self, folder, entry):
+        index_path = os.path.join(folder, RUNS_INDEX)
+        if folder not in self._indexed:
+            self._indexed[folder] = {e["run_id"] for e in _read_index(index_path)}
+        if entry["run_id"] not in self._indexed[folder]:
+            with open(index_path, "a", encoding="utf-8") as index_file:
+                index_file.write(json.dumps(entry) + "\n")
+            self._indexed[folder].add(entry["run_id"])
+            return
+        # Rerun or resumed run: rewrite the index with its new line
+        entries = [e for e in _read_index(index_path) if e["run_id"] != entry["run_id"]] + [entry]
+        tmp_path = index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as index_file:
+            index_file.writelines(json.dumps(e) + "\n" for e in entries)
+        os.replace(tmp_path, index_path)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def _read_index(path):
+    """Entries of a runs.jsonl index (none when missing, cut lines skipped)."""
+    entries = []
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+    return entries
+
+
+class MemorySink:
+    def __init__(self):
+        """Keep runs in memory (used by worker processes, which hand them back to the parent)."""
+        self.runs = []
+
+    def write_run(self, run_id, rate, rows, seed=None, meta=None):
+        self.runs.append((run_id, rate, rows, seed, meta))
+        return run_id
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class SqliteSink:
+    def __init__(self, path=DEFAULT_STORE, batch_size=10000):
+        """
+        Single append-only SQLite file for a whole sweep, keyed by
+        run id, mutation rate, seed and generation. A run id already
+        stored is never overwritten: storing it again with the same rate,
+        seed and length is a no-op, with different ones a ValueError.
+        Rows are buffered and inserted in batches of batch_size.
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self._runs = []
+        self._rows = []
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.connection = connect(path)
+
+    def write_run(self, run_id, rate, rows, seed=None, meta=None):
+        self._runs.append((run_id, float(rate), seed, len(rows), json.dumps(meta or {})))
+        self._rows.extend((run_id, float(rate), int(gen), best_distance, best_fitness, avg)
+                          for gen, best_distance, best_fitness, avg in rows)
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+        return f"{self.path}#{run_id}"
+
+    def flush(self):
+        if not self._runs:
+            return
+        with self.connection:
+            self._check_conflicts()
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO runs VALUES (?, ?, ?, ?, ?)", self._runs)
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO generations VALUES (?, ?, ?, ?, ?, ?)", self._rows)
+        self._runs = []
+        self._rows = []
+
+    def _check_conflicts(self):
+        """Refuse a batch reusing a run id with another rate, seed or length."""
+        seen = {}
+        for run_id, rate, seed, n_generations, _ in self._runs:
+            stored = seen.get(run_id)
+            if stored is None:
+                stored = self.connection.execute(
+                    "SELECT rate, seed, n_generations FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            if stored is not None and tuple(stored) != (rate, seed, n_generations):
+                self._runs = []
+                self._rows = []
+                raise ValueError(f"Run id {run_id} already stored in {self.path} with (rate, seed, generations) "
+                                 f"{tuple(stored)}, not {(rate, seed, n_generations)}")
+            seen[run_id] = (rate, seed, n_generations)
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def connect(path=DEFAULT_STORE):
+    """Open (and create if needed) a results store."""
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS runs ("
+        " run_id TEXT PRIMARY KEY, rate REAL, seed INTEGER, n_generations INTEGER, meta TEXT)")
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS generations ("
+        " run_id TEXT, rate REAL, generation INTEGER,"
+        " best_distance REAL, best_fitness REAL, average_fitness REAL,"
+        " PRIMARY KEY (run_id, generation))")
+    connection.execute("CREATE INDEX IF NOT EXISTS generations_rate ON generations (rate, generation)")
+    return connection
+
+
+def list_rates(path=DEFAULT_STORE):
+    """Mutation rates present in a store."""
+    with closing(sqlite3.connect(path)) as connection:
+        return [row[0] for row in connection.execute("SELECT DISTINCT rate FROM runs ORDER BY rate")]
+
+
+def list_runs(path=DEFAULT_STORE, rate=None):
+    """(run_id, rate, seed, n_generations, meta) of every run, optionally for one rate."""
+    query = "SELECT run_id, rate, seed, n_generations, meta FROM runs"
+    params = ()
+    if rate is not None:
+        query += " WHERE rate = ?"
+        params = (float(rate),)
+    with closing(sqlite3.connect(path)) as connection:
+        return [(run_id, rate, seed, n, json.loads(meta or "{}"))
+                for run_id, rate, seed, n, meta in connection.execute(query + " ORDER BY run_id", params)]
+
+
+def load_run(path, run_id):
+    """One run as a DataFrame with the same columns as the CSV files."""
+    import pandas as pd
+    with closing(sqlite3.connect(path)) as connection:
+        df = pd.read_sql_query(
+            "SELECT generation, best_distance, best_fitness, average_fitness FROM generations"
+            " WHERE run_id = ? ORDER BY generation", connection, params=(run_id,))
+    df.columns = COLUMNS
+    return df
+
+
+def last_rowid(path=DEFAULT_STORE):
+    """Highest row id of the generations table (rows are only ever appended)."""
+    with closing(sqlite3.connect(path)) as connection:
+        return connection.execute("SELECT COALESCE(MAX(rowid), 0) FROM generations").fetchone()[0]
+
+
+def generation_sums(path, rate, since=0, until=None):
+    """
+    Per-generation count, sum and sum of squares of every metric for one rate,
+    computed inside SQLite (no per-run parsing). since/until restrict the sums
+    to rows appended in that row id range, for incremental aggregation.
+    Returns rows of (generation, count, sum_bd, sumsq_bd, sum_bf, sumsq_bf, sum_af, sumsq_af).
+    """
+    if until is None:
+        until = last_rowid(path)
+    with closing(sqlite3.connect(path)) as connection:
+        return connection.execute(
+            "SELECT generation, COUNT(*),"
+            " SUM(best_distance), SUM(best_distance * best_distance),"
+            " SUM(best_fitness), SUM(best_fitness * best_fitness),"
+            " SUM(average_fitness), SUM(average_fitness * average_fitness)"
+            " FROM generations WHERE rate = ? AND rowid > ? AND rowid <= ?"
+            " GROUP BY generation ORDER BY generation",
+            (float(rate), since, until)).fetchall()
+
+
+def last_rows(path, rate, since=0, until=None):
+    """
+    Last generation of every run of one rate appended in the row id range:
+    rows of (run_id, generation, best_distance, best_fitness, average_fitness).
+    """
+    if until is None:
+        until = last_rowid(path)
+    with closing(sqlite3.connect(path)) as connection:
+        return connection.execute(
+            "SELECT g.run_id, g.generation, g.best_distance, g.best_fitness, g.average_fitness"
+            " FROM generations g JOIN ("
+            "  SELECT run_id, MAX(generation) AS last FROM generations"
+            "  WHERE rate = ? AND rowid > ? AND rowid <= ? GROUP BY run_id) l"
+            " ON g.run_id = l.run_id AND g.generation = l.last",
+            (float(rate), since, until)).fetchall()